@@ -10,23 +10,110 @@ Active8 (04-03-15)
 license: GNU-GPL2
 """
 from __future__ import division, print_function, absolute_import, unicode_literals
-from future import standard_library
 import os
+import re
 import sys
-import json
-import yaml
-import pickle
-import collections
+import operator
+import importlib
 
-from fallbackdocopt import docopt, DocoptExit
+from fallbackdocopt import docopt, compile_spec, parse_defaults, DocoptExit, enable_disk_cache, disable_disk_cache, spec_cache
 from os.path import exists, expanduser
-from consoleprinter import abort, console, handle_ex, snake_case, get_print_yaml, console_warning, remove_escapecodes, remove_extra_indentation
+
+
+class LazyModule(object):
+    """
+    Stand-in for a module that is imported on first attribute access,
+    keeps modules the parse path does not need out of import arguments
+    """
+    def __init__(self, name):
+        """
+        @type name: str
+        @return: None
+        """
+        self.__name = name
+
+    def __repr__(self):
+        """
+        __repr__
+        """
+        return "<lazy module %r>" % self.__name
+
+    def __getattr__(self, item):
+        """
+        @type item: str
+        @return: object
+        """
+        return getattr(importlib.import_module(self.__name), item)
+
+
+def lazy_function(module, name):
+    """
+    @type module: LazyModule
+    @type name: str
+    @return: function
+    """
+    def wrapper(*args, **kwargs):
+        """
+        @type args: tuple
+        @type kwargs: dict
+        @return: object
+        """
+        return getattr(module, name)(*args, **kwargs)
+
+    wrapper.__name__ = str(name)
+    return wrapper
+
+
+io = LazyModule("io")
+json = LazyModule("json")
+shlex = LazyModule("shlex")
+futures = LazyModule("concurrent.futures")
+multiprocessing = LazyModule("multiprocessing")
+yaml = LazyModule("yaml")
+pickle = LazyModule("pickle")
+collections = LazyModule("collections")
+consoleprinter = LazyModule("consoleprinter")
+abort = lazy_function(consoleprinter, "abort")
+console = lazy_function(consoleprinter, "console")
+handle_ex = lazy_function(consoleprinter, "handle_ex")
+snake_case = lazy_function(consoleprinter, "snake_case")
+get_print_yaml = lazy_function(consoleprinter, "get_print_yaml")
+console_warning = lazy_function(consoleprinter, "console_warning")
+remove_escapecodes = lazy_function(consoleprinter, "remove_escapecodes")
+remove_extra_indentation = lazy_function(consoleprinter, "remove_extra_indentation")
+parse_async = lazy_function(LazyModule("arguments.aio"), "parse_async")
 
 COMPARABLE, CALLABLE, VALIDATOR, TYPE, DICT, ITERABLE = list(range(6))
 
+# what consoleprinter.remove_escapecodes strips, without importing consoleprinter for help
+ANSI_ESCAPE = re.compile(r"\x1b[^a-z]*[a-z]")
+
+# normalized docs and commands tables by doc, shared by all Arguments instances and subclasses
+doc_cache = {}
+DOC_CACHE_SIZE = 512
+
+# fewer paths than this are stat'ed serially by stat_paths, a pool costs more than it overlaps
+STAT_POOL_SIZE = 64
+
+# spec, schema and input format of a parse_file worker, set once per process by parse_file_init
+parse_file_state = {}
+
 MARKER = object()
 
 
+def import_numpy():
+    """
+    numpy when it is installed, else None
+    @return: module, None
+    """
+    try:
+        import numpy
+    except ImportError:
+        return None
+
+    return numpy
+
+
 def is_python3():
     """
     is_python3
@@ -68,6 +155,29 @@ class Schema(object):
         """
         # noinspection PyUnresolvedReferences
         self._schema[key] = Use(str)
+        self._compiled = self._collecting = self._columns = None
+
+    def compile(self, collect=False):
+        """
+        Validator function for this schema, compiled once. It validates like validate but
+        does not dispatch on the schema again on every call. Compile again after changing
+        the schema, add_void_schema_item does that itself.
+        With collect a dict schema checks every key before it raises one SchemaError,
+        with a SchemaErrorRecord per failed key in its records.
+        @type collect: bool
+        @return: function
+        """
+        if type(self).validate != Schema.validate:
+            return self.validate
+
+        name = "_collecting" if collect else "_compiled"
+        compiled = self.__dict__.get(name)
+
+        if compiled is None:
+            compiled = compile_schema(self._schema, self._error, collect)
+            setattr(self, name, compiled)
+
+        return compiled
 
     def get_keys(self):
         """
@@ -101,11 +211,15 @@ class Schema(object):
             # for each key and value find a schema entry matching them, if any
             sorted_skeys = list(sorted(s, key=priority))
 
+            # literal keys sort first and only match an equal key, so they are looked up
+            literal_skeys = dict((k, k) for k in sorted_skeys if priority(k) == COMPARABLE)
+            scanned_skeys = [k for k in sorted_skeys if priority(k) != COMPARABLE]
+
             for key, value in list(data.items()):
                 valid = False
                 skey = None
 
-                for skey in sorted_skeys:
+                for skey in ([literal_skeys[key]] if key in literal_skeys else scanned_skeys):
                     svalue = s[skey]
                     try:
                         nkey = Schema(skey, error=e).validate(key)
@@ -135,17 +249,17 @@ class Schema(object):
                     new[nkey] = nvalue
                 elif skey is not None:
                     if x is not None:
-                        raise SchemaError(['invalid value for key %r' % key] + x.autos, [e] + x.errors)
+                        raise SchemaError([SchemaMessage('invalid value for key %r', key)] + x.autos, [e] + x.errors)
 
             required = set(k for k in s if not isinstance(k, Optional))
             if coverage != required:
-                raise SchemaError('missed keys %r' % (required - coverage), e)
+                raise SchemaError(SchemaMessage('missed keys %r', required - coverage), e)
 
             if len(new) != len(data):
                 wrong_keys = set(data.keys()) - set(new.keys())
                 s_wrong_keys = ', '.join('%r' % (k,) for k in sorted(wrong_keys))
 
-                raise SchemaError('wrong keys %s in %r' % (s_wrong_keys, data), e)
+                raise SchemaError(SchemaMessage('wrong keys %s in %r', s_wrong_keys, data), e)
 
             # Apply default-having optionals that haven't been used:
             defaults = set(k for k in s if isinstance(k, Optional) and
@@ -160,7 +274,7 @@ class Schema(object):
             if isinstance(data, s):
                 return data
             else:
-                raise SchemaError('%r should be instance of %r' % (data, s), e)
+                raise SchemaError(SchemaMessage('%r should be instance of %r', data, s), e)
 
         if flavor == VALIDATOR:
             try:
@@ -170,7 +284,7 @@ class Schema(object):
             except SchemaError as x:
                 raise SchemaError([None] + x.autos, [e] + x.errors)
             except BaseException as x:
-                raise SchemaError('%r.validate(%r) raised %r' % (s, data, x), self._error)
+                raise SchemaError(SchemaMessage('%r.validate(%r) raised %r', s, data, x), self._error)
 
         if flavor == CALLABLE:
             f = s.__name__
@@ -182,16 +296,34 @@ class Schema(object):
             except SchemaError as x:
                 raise SchemaError([None] + x.autos, [e] + x.errors)
             except BaseException as x:
-                raise SchemaError('%s(%r) raised %r' % (f, data, x),
+                raise SchemaError(SchemaMessage('%s(%r) raised %r', f, data, x),
 
                                   self._error)
 
-            raise SchemaError('%s(%r) should evaluate to True' % (f, data), e)
+            raise SchemaError(SchemaMessage('%s(%r) should evaluate to True', f, data), e)
 
         if s == data:
             return data
         else:
-            raise SchemaError('%r does not match %r' % (s, data), e)
+            raise SchemaError(SchemaMessage('%r does not match %r', s, data), e)
+
+    def validate_many(self, records):
+        """
+        Validate a list of records at once. For a dict schema with literal keys the records
+        are split into a column per key and every column is validated with one compiled
+        check, type checks run over the whole column and Range checks on a numpy array when
+        numpy is installed.
+        Returns the validated records, with None for a record that failed, and a per record
+        error mask, True where a record failed.
+        @type records: list
+        @return: tuple
+        """
+        validate = self.__dict__.get("_columns")
+
+        if validate is None:
+            validate = self._columns = compile_columns(self._schema, self._error)
+
+        return validate(records)
 
 
 class And(object):
@@ -231,6 +363,12 @@ class Arguments(object):
     """
     Arguments
     """
+    # converters by argument name, for arguments the doc does not type itself
+    m_types = {}
+
+    # Arguments subclass by subcommand, filled with the subcommand decorator and used by route
+    m_commands = {}
+
     def __init__(self, doc=None, validateschema=None, argvalue=None, yamlstr=None, yamlfile=None, parse_arguments=True, persistoption=False, alwaysfullhelp=False, version=None, parent=None, python3only=False):
         """
         @type doc: str, None
@@ -272,11 +410,10 @@ class Arguments(object):
             self.m_doc = remove_extra_indentation(__main__.__doc__, triggerword)
 
         if doc is not None:
-            triggerword = "usage"
-            newdoc = remove_extra_indentation(doc, triggerword)
-            self.m_doc = self.reorder_commandlist(newdoc)
+            self.m_doc = normalize_doc(doc, self.help_commands(argvalue))
 
         self.m_argv = argvalue
+        self.m_subcommand = None
         self.m_persistoption = persistoption
         self.m_alwaysfullhelp = alwaysfullhelp
         self.m_version = version
@@ -291,14 +428,17 @@ class Arguments(object):
         elif yamlstr:
             self.from_yaml(yamlstr)
         elif parse_arguments is True:
+            self.print_help_request()
             parsedok = False
             exdoc = False
             sysex = False
+            suggestions = ()
             try:
                 self.parse_arguments(self.m_schema)
                 parsedok = True
-            except DocoptExit:
+            except DocoptExit as ex:
                 exdoc = True
+                suggestions = ex.suggestions
 
                 raise
             except SystemExit:
@@ -329,6 +469,7 @@ class Arguments(object):
                     raise SystemExit(1)
                 else:
                     if exdoc is True:
+                        self.print_suggestions(suggestions)
                         print(self.get_usage_from_mdoc())
 
                         raise SystemExit(1)
@@ -345,6 +486,97 @@ class Arguments(object):
         if yamlfile:
             raise AssertionError("not implemented")
 
+    @classmethod
+    def subcommand(cls, name):
+        """
+        Class decorator that registers an Arguments subclass as subcommand name of cls.
+        The subclass takes an argvalue keyword, its usage starts with name.
+        @type name: str
+        @return: function
+        """
+        def register(subclass):
+            """
+            @type subclass: type
+            @return: type
+            """
+            cls.add_subcommands({name: subclass})
+            return subclass
+
+        return register
+
+    @classmethod
+    def add_subcommands(cls, commands=None, group=None):
+        """
+        Register subcommands of cls without importing them. commands maps names to
+        Arguments subclasses, to "module:class" paths or to ("module:class", summary)
+        pairs, group names an entry point group whose entry points map names to paths.
+        route imports the module of a path when its subcommand is selected, help lists
+        them from subcommand_manifest with the declared summaries.
+        @type commands: dict, None
+        @type group: str, None
+        @return: None
+        """
+        if "m_commands" not in cls.__dict__:
+            cls.m_commands = dict(cls.m_commands)
+
+        if group is not None:
+            cls.m_commands.update(entry_point_commands(group))
+
+        if commands:
+            cls.m_commands.update(commands)
+
+    def help_commands(self, argv):
+        """
+        The (name, summary) pairs of the registered subcommands when argv asks for help,
+        for the commands table of the doc, else nothing, so a parse without help never
+        loads a subcommand
+        @type argv: list, None
+        @return: tuple
+        """
+        if not self.m_commands:
+            return ()
+
+        if argv is None:
+            argv = sys.argv[1:]
+
+        argv = leading_tokens(argv, self.m_commands)
+
+        if "-h" not in argv and "--help" not in argv:
+            return ()
+
+        return subcommand_manifest(self.m_commands)
+
+    @classmethod
+    def route(cls, argv=None):
+        """
+        Parse argv down the tree of subcommands, every level matching only its own
+        tokens: a level with subcommands parses the tokens up to and including the
+        next registered subcommand and leaves the rest in m_subcommand, which the
+        subcommand then parses, starting with its own name. Returns the Arguments of
+        the deepest subcommand, with the levels above it in m_parents.
+        @type argv: list, None
+        @return: Arguments
+        """
+        if argv is None:
+            argv = sys.argv[1:]
+
+        node = cls
+        parents = []
+        argv = list(argv)
+
+        while True:
+            arguments = node(argvalue=argv)
+
+            if parents:
+                arguments.m_parents = list(parents)
+
+            if arguments.m_subcommand is None:
+                return arguments
+
+            parents.append(arguments)
+            argv = arguments.m_subcommand
+            node = load_subcommand(node.m_commands[argv[0]])
+
     def __add_parent(self, parent):
         """
         @type parent: Arguments
@@ -366,18 +598,12 @@ class Arguments(object):
         """
         cmdbuffering = False
         commands = {}
-        newdoc = ""
+        lines = []
         end_of_doc = []
-        end_of_doc_markers = ["author", "project", "created"]
+        end_of_doc_markers = ("author:", "project:", "created:")
 
         for line in doc.split("\n"):
-            eofm = False
-
-            for marker in end_of_doc_markers:
-                if line.replace(" ", "").strip().startswith(marker + ":"):
-                    eofm = True
-
-            if eofm is True:
+            if line.replace(" ", "").strip().startswith(end_of_doc_markers):
                 end_of_doc.append(line)
             else:
                 if cmdbuffering is True and line.find(" ") == 0:
@@ -386,35 +612,23 @@ class Arguments(object):
                     if len(ls) > 0 and len(ls[0].strip()) > 0:
                         commands[ls[0]] = " ".join(ls[1:])
                 else:
-                    newdoc += line
-                    newdoc += "\n"
+                    lines.append(line)
 
                 if "commands:" in line.lower():
                     cmdbuffering = True
 
         commandkeys = sorted(commands.keys())
-        longest = 0
-
-        for cmd in commandkeys:
-            if len(cmd) > longest:
-                longest = len(cmd)
-
-        newdoc = newdoc.strip() + "\n"
+        longest = max([len(cmd) for cmd in commandkeys] or [0])
+        lines = ["\n".join(lines).strip()]
 
         for cmd in commandkeys:
             if len(commands[cmd].strip()) > 0:
-                newdoc += " " * 4
-                newdoc += cmd + " : "
-                newdoc += " " * 2
-                newdoc += " " * (longest - len(cmd))
-                newdoc += commands[cmd].strip()
-                newdoc += "\n"
+                lines.append(" " * 4 + cmd + " : " + " " * (2 + longest - len(cmd)) + commands[cmd].strip())
 
-        if len(end_of_doc) > 0:
-            newdoc = newdoc.strip() + "\n\n"
+        newdoc = "\n".join(lines)
 
-            for line in end_of_doc:
-                newdoc += line + "\n"
+        if len(end_of_doc) > 0:
+            newdoc = newdoc.strip() + "\n\n" + "\n".join(end_of_doc)
 
         return newdoc.strip()
 
@@ -439,6 +653,8 @@ class Arguments(object):
         if schema is not None:
             self.m_schema = schema
 
+        typed = set(self.m_types)
+
         if self.load is None:
             if self.m_persistoption is True:
                 optsplit = self.m_doc.split("Options:")
@@ -485,18 +701,30 @@ class Arguments(object):
                             # console_warning("removed parent")
                             self.m_argv.remove(parent.command)
 
-                arguments = dict(docopt(self.m_doc, self.m_argv, options_first=False, version=self.m_version))
+                spec = compile_spec(self.m_doc)
+
+                if self.m_commands:
+                    index = split_subcommand(self.m_argv, self.m_commands, spec)
+
+                    if index is not None:
+                        self.m_subcommand = self.m_argv[index:]
+                        self.m_argv = self.m_argv[:index + 1]
+
+                arguments = dict(spec.parse(self.m_argv, options_first=False, version=self.m_version))
+                convert_arguments(arguments, self.m_types)
+                typed.update(argument_name(k) for k, name in spec.types)
                 self.parsedarguments = arguments.copy()
 
                 if "--help" in [s for s in arguments.keys() if isinstance(s, str)] or "-h" in [s for s in arguments.keys() if isinstance(s, str)]:
                     self.doprinthelp = True
-            except DocoptExit:
+            except DocoptExit as ex:
                 if self.m_alwaysfullhelp is True:
                     for sarg in list(sys.argv):
                         if "-h" in sarg or "--help" in sarg:
                             self.print_commandless_help()
                             exit(1)
                     else:
+                        self.print_suggestions(ex.suggestions)
                         usage = self.get_usage_from_mdoc()
                         print("\033[34m" + usage + "\033[0m")
 
@@ -512,30 +740,10 @@ class Arguments(object):
             k = ""
             try:
                 if isinstance(arguments, dict):
-                    for k in arguments:
-                        trypath = False
-
-                        if isinstance(arguments[k], str):
-                            trypath = "~" in arguments[k] or "/" in arguments[k]
+                    resolver = PathResolver()
 
-                        if trypath is False:
-                            trypath = "folder" in k or "path" in k
-
-                        if trypath:
-                            if hasattr(arguments[k], "replace"):
-                                arguments[k] = arguments[k].replace("~", expanduser("~"))
-
-                                if arguments[k].strip() == ".":
-                                    arguments[k] = os.getcwd()
-
-                                if "./" in arguments[k].strip():
-                                    arguments[k] = os.path.abspath(arguments[k])
-
-                                if arguments[k].rstrip("/").strip() != "/":
-                                    arguments[k] = arguments[k].rstrip("/").strip()
-
-                            if hasattr(arguments[k], "strip") and arguments[k].strip() == "":
-                                arguments[k] = "/"
+                    for k in arguments:
+                        arguments[k] = normalize_path(k, arguments[k], resolver)
 
             except AttributeError as e:
                 console("Attribute error:" + k.strip(), "->", str(e), color="red")
@@ -559,20 +767,7 @@ class Arguments(object):
             if not isinstance(arguments, dict):
                 raise AssertionError("arguments should be a dict by now")
 
-            if "--" in arguments:
-                del arguments["--"]
-
-            validate_arguments = dict((x.replace("<", "").replace(">", "").replace("--", "").replace("-", "_"), y) for x, y in arguments.items())
-
-            if self.m_schema is not None:
-                schema_keys = self.m_schema.get_keys()
-
-                for k in list(validate_arguments.keys()):
-                    if k not in schema_keys:
-                        self.m_schema.add_void_schema_item(k)
-                self.m_schema.validate(validate_arguments)
-
-            arguments = dict((x.replace("<", "pa_").replace(">", "").replace("--", "op_").replace("-", "_"), y) for x, y in arguments.items())
+            arguments = prepare_arguments(arguments, self.m_schema)
         except SchemaError as e:
             name = self.get_command_path()
             abort(name, "".join([x for x in e.errors if x]))
@@ -581,51 +776,50 @@ class Arguments(object):
 
             raise
 
-        options, positional_arguments = self.sort_arguments(arguments)
+        options, positional_arguments = self.sort_arguments(arguments, typed)
         self._set_fields(positional_arguments, options)
-        checking_commands = False
-
-        for line in self.m_doc.split("\n"):
-            if line.strip().lower().startswith("commands:"):
-                checking_commands = True
-
-            if checking_commands is True:
-                ls = [x for x in line.split() if x]
 
-                if len(ls) > 1:
-                    command = ls[0].strip()
-
-                    if command not in self.m_commandline_help and command not in ["author", "date", "project"]:
-                        if command not in self.m_commandline_help_default:
-                            self.m_commandline_help_default[command] = str(" ".join(ls[1:])).strip()
+        for command, helptext in command_table(self.m_doc):
+            if command not in self.m_commandline_help and command not in self.m_commandline_help_default:
+                self.m_commandline_help_default[command] = helptext
 
     def print_commandless_help(self):
         """
         print_commandless_help
         """
-        doc_help = self.m_doc.strip().split("\n")
+        write_help(commandless_help(self.m_doc))
+
+    def print_help_request(self):
+        """
+        Serve -h, --help and --version from argv before anything is parsed, when the answer
+        does not depend on the parse: the version, or the commandless help rendered once per doc.
+        Raises SystemExit when it served one, returns None to parse as usual.
+        @return: None
+        """
+        if self.m_parents or self.m_commandline_help or self.m_persistoption:
+            return
 
-        if len(doc_help) > 0:
-            print("\033[33m--\033[0m")
-            print("\033[34m" + doc_help[0] + "\033[0m")
-            asp = "author  :"
-            doc_help_rest = "\n".join(doc_help[1:])
+        argv = sys.argv[1:] if self.m_argv is None else self.m_argv
+        request = help_request(leading_tokens(argv, self.m_commands), self.m_doc)
 
-            if asp in doc_help_rest:
-                doc_help_rest = doc_help_rest.split("author  :")
+        if request == "version" and self.m_version:
+            print(self.m_version)
 
-                if len(doc_help_rest) > 1:
-                    print("\n\033[33m" + doc_help_rest[0].strip() + "\n")
-                    print("\033[37m" + asp + doc_help_rest[1] + "\033[0m")
-                else:
-                    print(doc_help_rest)
-            else:
-                print(doc_help_rest)
+            raise SystemExit(0)
 
-            print("\033[33m--\033[0m")
-        else:
-            print("\033[31mERROR, doc should have more then one line\033[0m")
-            print(self.m_doc)
+        if request == "help":
+            self.print_commandless_help()
+
+            raise SystemExit(0)
+
+    @staticmethod
+    def print_suggestions(suggestions):
+        """
+        @type suggestions: list, tuple
+        @return: None
+        """
+        if suggestions:
+            print("\033[33mdid you mean " + " or ".join(suggestions) + "?\033[0m")
 
     def set_command_help(self, command, helptext):
         """
@@ -652,49 +846,15 @@ class Arguments(object):
         else:
             usage = self.m_doc
 
-        have_command = False
-
-        for line in usage.split("\n"):
+        # noinspection PyUnresolvedReferences
+        if self.command in self.m_commandline_help:
             # noinspection PyUnresolvedReferences
-            if self.command in self.m_commandline_help and line.strip().startswith(self.command):
-                have_command = True
-                break
-
-        if have_command:
-            for line in usage.split("\n"):
-                ls = line.split()
-
-                # noinspection PyUnresolvedReferences
-                if self.command in self.m_commandline_help and line.strip().startswith(self.command):
-                    print("\033[32m" + line + "\033[0m")
-
-                    if len(ls) > 0:
-                        ls = [x for x in ls if x]
-
-                        if ls:
-                            # noinspection PyUnresolvedReferences
-                            if ls[0] == self.command:
-                                js = remove_escapecodes("".join(line.split(ls[0], maxsplit=1)))
-                                lenjs = len(remove_escapecodes(ls[0]).strip())
-
-                                if lenjs < 3:
-                                    lenjs = 1
-
-                                spaces = (len(js) - len(js.strip())) + lenjs
-                                lineorg = line
-
-                                # noinspection PyUnresolvedReferences
-                                line = "\033[36m" + self.m_commandline_help[self.command] + "\033[0m"
-
-                                # line = line.replace(ls[0], "", 1).strip()
-
-                                if line not in lineorg:
-                                    print((spaces * " ") + line)
+            variants = commandline_help(usage, self.command, self.m_commandline_help[self.command])
+        else:
+            variants = None
 
-                elif line.strip().startswith(self.command + " "):
-                    print("\033[32m" + line + "\033[0m")
-                else:
-                    print(line)
+        if variants is not None:
+            write_help(variants)
         else:
             self.print_commandless_help()
 
@@ -880,9 +1040,12 @@ class Arguments(object):
             setattr(self, str(k), v)
 
     @staticmethod
-    def sort_arguments(arguments):
+    def sort_arguments(arguments, typed=()):
         """
+        Split into options and positional arguments, guessing numbers in the string
+        values of arguments whose names are not in typed
         @type arguments: dict
+        @type typed: set, tuple
         @return: tuple
         """
         opts = {}
@@ -892,7 +1055,7 @@ class Arguments(object):
             try:
                 possnum = arguments[k]
 
-                if isinstance(possnum, str):
+                if isinstance(possnum, str) and k.replace("pa_", "").replace("op_", "") not in typed:
                     possnum = possnum.replace("'", "").replace('"', '')
 
                     if "." in possnum:
@@ -955,6 +1118,22 @@ class Arguments(object):
         """
         self.m_reprdict = yaml.load(yamldata)
 
+    def stat_paths(self, name, workers=None):
+        """
+        Opt-in check of the paths in argument name, a list such as <path>... or one path,
+        returns their os.stat in argv order, None for a path that does not exist. See
+        stat_paths for when the thread pool is worth it.
+        @type name: str
+        @type workers: int, None
+        @return: list
+        """
+        paths = getattr(self, name)
+
+        if not isinstance(paths, list):
+            paths = [paths]
+
+        return stat_paths(paths, workers)
+
     def save(self, path):
         """
         @type path: str
@@ -1062,132 +1241,1437 @@ class Or(And):
                 return s.validate(data)
             except SchemaError as _x:
                 x = _x
-        raise SchemaError(['%r did not validate %r' % (self, data)] + x.autos, [self._error] + x.errors)
+        raise SchemaError([SchemaMessage('%r did not validate %r', self, data)] + x.autos, [self._error] + x.errors)
 
 
-class SchemaError(Exception):
-    """Error during Schema validation."""
-    def __init__(self, autos, errors):
+class ParseError(object):
+    """
+    Result of parse_many for an argv that did not match the doc or the schema
+    """
+    __slots__ = ("argv", "exception")
+    ok = False
+
+    def __init__(self, argv, exception):
         """
-        @type autos:  list, tuple, str
-        @type errors: list, str
+        @type argv: list
+        @type exception: DocoptExit, SchemaError
         @return: None
         """
-        self.autos = autos if isinstance(autos, list) else [autos]
-        self.errors = errors if isinstance(errors, list) else [errors]
-        Exception.__init__(self, self.code)
+        self.argv = argv
+        self.exception = exception
 
-    @property
-    def code(self):
+    def __repr__(self):
         """
-        code
+        __repr__
         """
+        return "%s(%r, %r)" % (self.__class__.__name__, self.argv, self.message)
 
-        def uniq(seq):
-            """
-            @type seq: str
-            @return: None
-            """
-            seen = set()
-            seen_add = seen.add
-            return [x for x in seq if x not in seen and not seen_add(x)]
-
-        # noinspection PyTypeChecker
-        a = uniq(i for i in self.autos if i is not None)
-        # noinspection PyTypeChecker
-        e = uniq(i for i in self.errors if i is not None)
-
-        if e:
-            return '\n'.join(e)
+    @property
+    def message(self):
+        """
+        message
+        """
+        return self.exception.code
 
-        return '\n'.join(a)
+    @property
+    def suggestions(self):
+        """
+        suggestions
+        """
+        return getattr(self.exception, "suggestions", ())
 
 
-class Use(object):
+class ParseResult(object):
     """
-    Use
+    Result of parse_many for an argv that matched, fields read like the attributes of Arguments
     """
-    def __init__(self, callable_, error=None):
+    __slots__ = ("argv", "positional", "options")
+    ok = True
+
+    def __init__(self, argv, positional, options):
         """
-        @type callable_:  list, tuple
-        @type error: str, None
+        @type argv: list
+        @type positional: dict
+        @type options: dict
         @return: None
         """
-        assert callable(callable_)
-        self._callable = callable_
-        self._error = error
+        self.argv = argv
+        self.positional = positional
+        self.options = options
 
     def __repr__(self):
         """
         __repr__
         """
-        return '%s(%r)' % (self.__class__.__name__, self._callable)
+        return "%s(%r)" % (self.__class__.__name__, self.as_dict())
 
-    def validate(self, data):
+    def __getattr__(self, item):
         """
-        @type data: str
-        @return: None
+        @type item: str
+        @return: object
         """
-        try:
-            return self._callable(data)
-        except SchemaError as x:
-            raise SchemaError([None] + x.autos, [self._error] + x.errors)
-        except BaseException as x:
-            f = self._callable.__name__
+        for fields in (self.options, self.positional):
+            if item in fields:
+                value = fields[item]
 
-            raise SchemaError('%s(%r) raised %r' % (f, data, x), self._error)
+                if hasattr(value, "strip"):
+                    value = value.strip("'")
+                    value = value.strip('"')
 
+                return value
 
-def delete_directory(dirpath, excluded_file_names):
-    """
-    @type dirpath: str
-    @type excluded_file_names: list, tuple
-    @return: int
-    """
-    for rootpath, dirs, files in os.walk(dirpath):
-        for f in files:
-            fp = os.path.join(rootpath, f)
+        raise AttributeError(item)
 
-            for exname in excluded_file_names:
-                if not os.path.basename(fp) == exname:
-                    if os.path.exists(fp):
-                        os.remove(fp)
+    def as_dict(self):
+        """
+        as_dict
+        """
+        return {"positional": self.positional, "options": self.options}
 
-    dirpaths = []
 
-    for rootpath, dirs, files in os.walk(dirpath):
-        dirpaths.append(rootpath)
+class PathResolver(object):
+    """
+    Home and working directory for normalize_path, looked up on first use and then
+    kept for the rest of the parse
+    """
+    def __init__(self):
+        """
+        __init__
+        """
+        self.m_home = None
+        self.m_cwd = None
 
-    dirpaths.sort(key=lambda x: len(x.split("/")))
-    dirpaths.reverse()
+    @property
+    def home(self):
+        """
+        home
+        """
+        if self.m_home is None:
+            self.m_home = expanduser("~")
 
-    for rootpath in dirpaths:
-        if dirpath != rootpath:
-            if os.path.exists(rootpath):
-                os.removedirs(rootpath)
+        return self.m_home
 
-    return len(list(os.walk(dirpath)))
+    @property
+    def cwd(self):
+        """
+        cwd
+        """
+        if self.m_cwd is None:
+            self.m_cwd = os.getcwd()
 
+        return self.m_cwd
 
-def flattened(mylist, newlist):
-    """
-    @type mylist: list
-    @type newlist: list
-    @return: None
-    """
-    for item in mylist:
-        if isinstance(item, list):
-            flattened(item, newlist)
-        else:
-            newlist.append(item)
+    def abspath(self, path):
+        """
+        os.path.abspath against the cached working directory
+        @type path: str
+        @return: str
+        """
+        return os.path.normpath(os.path.join(self.cwd, path))
 
 
-def not_exists(path):
+class Range(object):
     """
-    @type path: str
-    @return: None
+    Range, low <= data <= high where a bound of None is left out
     """
-    return not exists(path)
+    def __init__(self, low=None, high=None, error=None):
+        """
+        @type low: object
+        @type high: object
+        @type error: str, None
+        @return: None
+        """
+        self.low = low
+        self.high = high
+        self._error = error
+
+    def __repr__(self):
+        """
+        __repr__
+        """
+        return '%s(%r, %r)' % (self.__class__.__name__, self.low, self.high)
+
+    def validate(self, data):
+        """
+        @type data: object
+        @return: object
+        """
+        if (self.low is None or data >= self.low) and (self.high is None or data <= self.high):
+            return data
+
+        raise SchemaError(SchemaMessage('%r not in %r', data, self), self._error)
+
+
+class SchemaErrorRecord(object):
+    """
+    One failed key of a collecting validation, see Schema.compile
+    """
+    __slots__ = ("key", "validator", "value", "error")
+
+    def __init__(self, key, validator, value, error):
+        """
+        @type key: object
+        @type validator: object
+        @type value: object
+        @type error: SchemaError
+        @return: None
+        """
+        self.key = key
+        self.validator = validator
+        self.value = value
+        self.error = error
+
+    def __repr__(self):
+        """
+        __repr__
+        """
+        return "%s(%r, %r, %r)" % (self.__class__.__name__, self.key, self.validator, self.value)
+
+
+class SchemaError(Exception):
+    """Error during Schema validation, the message is only put together when code is read."""
+    def __init__(self, autos, errors, records=()):
+        """
+        @type autos:  list, tuple, str, SchemaMessage
+        @type errors: list, str
+        @type records: list, tuple
+        @return: None
+        """
+        self.autos = autos if isinstance(autos, list) else [autos]
+        self.errors = errors if isinstance(errors, list) else [errors]
+        self.records = records
+        Exception.__init__(self)
+
+    def __reduce__(self):
+        """
+        __reduce__
+        """
+        return self.__class__, ([None if i is None else str(i) for i in self.autos], self.errors)
+
+    def __repr__(self):
+        """
+        __repr__
+        """
+        return "%s(%r)" % (self.__class__.__name__, self.code)
+
+    def __str__(self):
+        """
+        __str__
+        """
+        return self.code
+
+    @property
+    def args(self):
+        """
+        The message as the only argument, like Exception(code), put together when read
+        """
+        return (self.code,)
+
+    @property
+    def code(self):
+        """
+        code
+        """
+
+        def uniq(seq):
+            """
+            @type seq: str
+            @return: None
+            """
+            seen = set()
+            seen_add = seen.add
+            return [x for x in seq if x not in seen and not seen_add(x)]
+
+        # noinspection PyTypeChecker
+        a = uniq(i for i in self.autos if i is not None)
+        # noinspection PyTypeChecker
+        e = uniq(i for i in self.errors if i is not None)
+
+        if e:
+            return '\n'.join(e)
+
+        return '\n'.join(str(i) for i in a)
+
+
+class SchemaMessage(object):
+    """
+    Message of a SchemaError, formatted when it is read and not when the error is raised
+    """
+    __slots__ = ("format", "args", "text")
+
+    def __init__(self, format, *args):
+        """
+        @type format: str
+        @type args: tuple
+        @return: None
+        """
+        self.format = format
+        self.args = args
+        self.text = None
+
+    def __eq__(self, other):
+        """
+        @type other: object
+        @return: bool
+        """
+        return str(self) == (str(other) if isinstance(other, SchemaMessage) else other)
+
+    def __ne__(self, other):
+        """
+        @type other: object
+        @return: bool
+        """
+        return not self == other
+
+    def __hash__(self):
+        """
+        __hash__
+        """
+        return hash(str(self))
+
+    def __repr__(self):
+        """
+        __repr__
+        """
+        return repr(str(self))
+
+    def __str__(self):
+        """
+        __str__
+        """
+        if self.text is None:
+            self.text = self.format % self.args
+
+        return self.text
+
+
+class Use(object):
+    """
+    Use
+    """
+    def __init__(self, callable_, error=None):
+        """
+        @type callable_:  list, tuple
+        @type error: str, None
+        @return: None
+        """
+        assert callable(callable_)
+        self._callable = callable_
+        self._error = error
+
+    def __repr__(self):
+        """
+        __repr__
+        """
+        return '%s(%r)' % (self.__class__.__name__, self._callable)
+
+    def validate(self, data):
+        """
+        @type data: str
+        @return: None
+        """
+        try:
+            return self._callable(data)
+        except SchemaError as x:
+            raise SchemaError([None] + x.autos, [self._error] + x.errors)
+        except BaseException as x:
+            f = self._callable.__name__
+
+            raise SchemaError(SchemaMessage('%s(%r) raised %r', f, data, x), self._error)
+
+
+def argument_name(key):
+    """
+    Name of a docopt key without <, > and leading dashes, as attributes and schemas use it
+    @type key: str
+    @return: str
+    """
+    return key.replace("<", "").replace(">", "").replace("--", "").replace("-", "_")
+
+
+def cache_doc(kind, doc, value):
+    """
+    @type kind: str, tuple
+    @type doc: str
+    @type value: object
+    @return: None
+    """
+    if len(doc_cache) >= DOC_CACHE_SIZE:
+        doc_cache.clear()
+
+    doc_cache[(kind, doc)] = value
+
+
+def command_table(doc):
+    """
+    Commands and their help texts in the commands table of doc, in doc order,
+    computed once per doc
+    @type doc: str
+    @return: tuple
+    """
+    table = doc_cache.get(("commands", doc))
+
+    if table is None:
+        table = []
+        checking_commands = False
+
+        for line in doc.split("\n"):
+            if line.strip().lower().startswith("commands:"):
+                checking_commands = True
+
+            if checking_commands is True:
+                ls = line.split()
+
+                if len(ls) > 1 and ls[0] not in ["author", "date", "project"]:
+                    table.append((ls[0], str(" ".join(ls[1:])).strip()))
+
+        table = tuple(table)
+        cache_doc("commands", doc, table)
+
+    return table
+
+
+def commandline_help(usage, command, helptext):
+    """
+    The help print_commandline_help shows for command in usage, styled and plain,
+    rendered once per usage, command and help text. None when no line of usage
+    starts with command.
+    @type usage: str
+    @type command: str
+    @type helptext: str
+    @return: tuple, None
+    """
+    key = ("commandline", command, helptext)
+
+    if (key, usage) in doc_cache:
+        return doc_cache[(key, usage)]
+
+    lines = usage.split("\n")
+    variants = None
+
+    if any(line.strip().startswith(command) for line in lines):
+        styled = []
+        helpline = "\033[36m" + helptext + "\033[0m"
+
+        for line in lines:
+            if not line.strip().startswith(command):
+                styled.append(line)
+                continue
+
+            styled.append("\033[32m" + line + "\033[0m")
+            ls = line.split()
+
+            if ls and ls[0] == command:
+                js = ANSI_ESCAPE.sub("", "".join(line.split(ls[0], 1)))
+                lenjs = len(ANSI_ESCAPE.sub("", ls[0]).strip())
+
+                if lenjs < 3:
+                    lenjs = 1
+
+                spaces = (len(js) - len(js.strip())) + lenjs
+
+                if helpline not in line:
+                    styled.append((spaces * " ") + helpline)
+
+        variants = help_variants("\n".join(styled))
+
+    cache_doc(key, usage, variants)
+    return variants
+
+
+def commandless_help(doc):
+    """
+    The help print_commandless_help shows for doc, styled and plain, rendered once per doc
+    @type doc: str
+    @return: tuple
+    """
+    variants = doc_cache.get(("help", doc))
+
+    if variants is not None:
+        return variants
+
+    doc_help = doc.strip().split("\n")
+    lines = ["\033[33m--\033[0m", "\033[34m" + doc_help[0] + "\033[0m"]
+    asp = "author  :"
+    doc_help_rest = "\n".join(doc_help[1:])
+
+    if asp in doc_help_rest:
+        doc_help_rest = doc_help_rest.split(asp)
+        lines.append("\n\033[33m" + doc_help_rest[0].strip() + "\n")
+        lines.append("\033[37m" + asp + doc_help_rest[1] + "\033[0m")
+    else:
+        lines.append(doc_help_rest)
+
+    lines.append("\033[33m--\033[0m")
+    variants = help_variants("\n".join(lines))
+    cache_doc("help", doc, variants)
+    return variants
+
+
+def compile_column(schema, error):
+    """
+    Validator for the column of values of one key, compiled once. It takes the column and
+    the positions to check, None for all, and returns the column with converted values and
+    the positions that failed. Returned together with whether it converts values at all.
+    @type schema: object
+    @type error: str, None
+    @return: tuple
+    """
+    steps = []
+
+    for step in (schema._args if type(schema) is And else [schema]):
+        # type, comparable, predicate and Range steps pass values through unchanged
+        converts = priority(step) not in (COMPARABLE, CALLABLE, TYPE) and type(step) is not Range
+        steps.append((step, compile_schema(step, schema._error if type(schema) is And else error), converts))
+
+    converting = any(step[2] for step in steps)
+
+    def validate_column(column, rows):
+        """
+        @type column: list
+        @type rows: list, None
+        @return: tuple
+        """
+        numpy = import_numpy()
+        failed = []
+
+        for step, validate, converts in steps:
+            indices = range(len(column)) if rows is None else rows
+            values = column if rows is None else [column[i] for i in rows]
+            passed = compile_column_check(numpy, step, values)
+
+            if passed is None:
+                passed = []
+
+                for i, value in zip(indices, values):
+                    try:
+                        value = validate(value)
+                    except SchemaError:
+                        passed.append(False)
+                        continue
+
+                    if converts:
+                        column[i] = value
+
+                    passed.append(True)
+
+            if not all(passed):
+                failed.extend(i for i, ok in zip(indices, passed) if not ok)
+                rows = [i for i, ok in zip(indices, passed) if ok]
+
+        if converting:
+            for i in (range(len(column)) if rows is None else rows):
+                if column[i] is None:
+                    failed.append(i)
+
+        return column, failed
+
+    return validate_column, converting
+
+
+def compile_column_check(numpy, step, values):
+    """
+    Check a type or Range step on a whole column at once, a Range on a numpy array when
+    numpy is given. Returns a boolean per value or None when the step has to be validated
+    value by value
+    @type numpy: module, None
+    @type step: object
+    @type values: list
+    @return: list, numpy.ndarray, None
+    """
+    if priority(step) == TYPE:
+        return [isinstance(value, step) for value in values]
+
+    if type(step) is not Range:
+        return None
+
+    if numpy is not None:
+        array = numpy.asarray(values)
+
+        # a column numpy could not make numbers of is compared value by value
+        if array.dtype.kind in "biuf":
+            passed = numpy.ones(len(values), dtype=bool)
+
+            if step.low is not None:
+                passed &= array >= step.low
+
+            if step.high is not None:
+                passed &= array <= step.high
+
+            return passed
+
+    low, high = step.low, step.high
+
+    try:
+        return [(low is None or value >= low) and (high is None or value <= high) for value in values]
+    except TypeError:
+        return None
+
+
+def compile_columns(schema, error):
+    """
+    Batch validator for Schema.validate_many. Dict schemas with only literal keys, plain or
+    Optional, are validated column by column, other schemas one record at a time
+    @type schema: object
+    @type error: str, None
+    @return: function
+    """
+    entries = []
+
+    if priority(schema) == DICT:
+        for skey in schema:
+            key = skey._schema if type(skey) is Optional else skey
+
+            if priority(key) != COMPARABLE or any(key == entry[0] for entry in entries):
+                entries = None
+                break
+
+            entries.append((key, operator.itemgetter(key), skey, compile_column(schema[skey], error)))
+    else:
+        entries = None
+
+    if entries is None:
+        validate = compile_schema(schema, error)
+
+        def validate_records(records):
+            """
+            @type records: list
+            @return: tuple
+            """
+            validated = []
+            mask = []
+
+            for record in records:
+                try:
+                    validated.append(validate(record))
+                    mask.append(False)
+                except SchemaError:
+                    validated.append(None)
+                    mask.append(True)
+
+            return validated, mask
+
+        return validate_records
+
+    keys = set(entry[0] for entry in entries)
+
+    def validate_columns(records):
+        """
+        @type records: list
+        @return: tuple
+        """
+        mask = [not isinstance(record, dict) or not keys.issuperset(record) for record in records]
+        columns = []
+
+        for key, getter, skey, (validate_column, converting) in entries:
+            rows = None
+
+            try:
+                column = list(map(getter, records))
+            except (KeyError, TypeError):
+                # some records miss the key or are no dicts, those are left out of the column
+                column = [MARKER if failed else record.get(key, MARKER) for record, failed in zip(records, mask)]
+                rows = [i for i, value in enumerate(column) if value is not MARKER]
+
+                if not isinstance(skey, Optional):
+                    for i, value in enumerate(column):
+                        if value is MARKER:
+                            mask[i] = True
+
+            column, failed = validate_column(column, rows)
+
+            for i in failed:
+                mask[i] = True
+
+            if converting or rows is not None and hasattr(skey, "default"):
+                columns.append((key, skey, column))
+
+        # records are copied, only converted values and defaults are written back
+        validated = [None if failed else type(record)(record) for record, failed in zip(records, mask)]
+
+        for key, skey, column in columns:
+            default = getattr(skey, "default", MARKER)
+
+            for record, value in zip(validated, column):
+                if record is not None:
+                    if value is not MARKER:
+                        record[key] = value
+                    elif default is not MARKER:
+                        record[skey.key] = default
+
+        return validated, mask
+
+    return validate_columns
+
+
+def compile_dict_schema(schema, error, collect=False):
+    """
+    @type schema: dict
+    @type error: str, None
+    @type collect: bool
+    @return: function
+    """
+    check = compile_schema(dict, error)
+    literals = {}
+    entries = []
+
+    for position, skey in enumerate(sorted(schema, key=priority)):
+        # keys are matched without raising when the key schema is a plain value or type,
+        # plain values are looked up in literals instead of scanned
+        target = skey._schema if type(skey) is Optional else skey
+        kind = priority(target)
+
+        if kind not in (COMPARABLE, TYPE):
+            kind, target = VALIDATOR, compile_schema(skey, error)
+
+        entry = (position, skey, kind, target, compile_schema(schema[skey], error), isinstance(skey, Optional))
+
+        if kind == COMPARABLE:
+            literals.setdefault(target, entry)
+        else:
+            entries.append(entry)
+
+    required = set(k for k in schema if not isinstance(k, Optional))
+    defaults = set(k for k in schema if isinstance(k, Optional) and hasattr(k, 'default'))
+
+    def validate_dict(data):
+        """
+        @type data: dict
+        @return: dict
+        """
+        data = check(data)
+        new = type(data)()
+        coverage = set()
+        covered_optionals = set()
+        records = []
+
+        for key, value in list(data.items()):
+            literal = literals.get(key)
+            match = literal
+            nkey = key
+
+            for entry in entries:
+                if literal is not None and entry[0] > literal[0]:
+                    break
+
+                kind, target = entry[2], entry[3]
+
+                if kind == TYPE:
+                    if not isinstance(key, target):
+                        continue
+
+                    nkey = key
+                else:
+                    try:
+                        nkey = target(key)
+                    except SchemaError:
+                        continue
+
+                match = entry
+                break
+
+            if match is None:
+                if collect:
+                    records.append(SchemaErrorRecord(key, None, value, SchemaError(SchemaMessage('wrong key %r in %r', key, data), error)))
+
+                continue
+
+            position, skey, kind, target, validate_value, optional = match
+            (covered_optionals if optional else coverage).add(skey)
+
+            try:
+                nvalue = validate_value(value)
+            except SchemaError as x:
+                if not collect:
+                    raise
+
+                records.append(SchemaErrorRecord(key, schema[skey], value, SchemaError([SchemaMessage('invalid value for key %r', key)] + x.autos, [error] + x.errors)))
+                continue
+
+            if nkey is None:
+                raise AssertionError("nkey is None")
+
+            if nvalue is None:
+                raise AssertionError("nvalue is None")
+
+            new[nkey] = nvalue
+
+        if collect:
+            for skey in required - coverage:
+                records.append(SchemaErrorRecord(skey, schema[skey], None, SchemaError(SchemaMessage('missed key %r', skey), error)))
+
+            if records:
+                raise SchemaError([i for record in records for i in record.error.autos], [i for record in records for i in record.error.errors], records)
+
+        if coverage != required:
+            raise SchemaError(SchemaMessage('missed keys %r', required - coverage), error)
+
+        if len(new) != len(data):
+            wrong_keys = set(data.keys()) - set(new.keys())
+            s_wrong_keys = ', '.join('%r' % (k,) for k in sorted(wrong_keys))
+
+            raise SchemaError(SchemaMessage('wrong keys %s in %r', s_wrong_keys, data), error)
+
+        for default in defaults - covered_optionals:
+            new[default.key] = default.default
+
+        return new
+
+    return validate_dict
+
+
+def compile_schema(schema, error=None, collect=False):
+    """
+    Turn schema into a function that validates like Schema(schema, error).validate,
+    the kind of every (sub)schema is decided here once instead of on every call
+    @type schema: object
+    @type error: str, None
+    @type collect: bool
+    @return: function
+    """
+    flavor = priority(schema)
+
+    if flavor == ITERABLE:
+        check = compile_schema(type(schema), error)
+        either = compile_validator(Or(*schema, error=error))
+        container = type(schema)
+
+        def validate_iterable(data):
+            """
+            @type data: list, tuple, set, frozenset
+            @return: list, tuple, set, frozenset
+            """
+            return container(either(d) for d in check(data))
+
+        return validate_iterable
+
+    if flavor == DICT:
+        return compile_dict_schema(schema, error, collect)
+
+    if flavor == TYPE:
+        def validate_type(data):
+            """
+            @type data: object
+            @return: object
+            """
+            if isinstance(data, schema):
+                return data
+
+            raise SchemaError(SchemaMessage('%r should be instance of %r', data, schema), error)
+
+        return validate_type
+
+    if flavor == VALIDATOR:
+        validate = compile_validator(schema)
+
+        def validate_validator(data):
+            """
+            @type data: object
+            @return: object
+            """
+            try:
+                return validate(data)
+            except SchemaError as x:
+                raise SchemaError([None] + x.autos, [error] + x.errors)
+            except BaseException as x:
+                raise SchemaError(SchemaMessage('%r.validate(%r) raised %r', schema, data, x), error)
+
+        return validate_validator
+
+    if flavor == CALLABLE:
+        def validate_callable(data):
+            """
+            @type data: object
+            @return: object
+            """
+            f = schema.__name__
+
+            try:
+                if schema(data):
+                    return data
+            except SchemaError as x:
+                raise SchemaError([None] + x.autos, [error] + x.errors)
+            except BaseException as x:
+                raise SchemaError(SchemaMessage('%s(%r) raised %r', f, data, x), error)
+
+            raise SchemaError(SchemaMessage('%s(%r) should evaluate to True', f, data), error)
+
+        return validate_callable
+
+    def validate_comparable(data):
+        """
+        @type data: object
+        @return: object
+        """
+        if schema == data:
+            return data
+
+        raise SchemaError(SchemaMessage('%r does not match %r', schema, data), error)
+
+    return validate_comparable
+
+
+def compile_validator(validator):
+    """
+    validate method of an And, Or, Use or Schema compiled into a function,
+    other validators keep their own validate
+    @type validator: object
+    @return: function
+    """
+    kind = type(validator)
+
+    if kind is Use:
+        call = validator._callable
+        error = validator._error
+
+        def validate_use(data):
+            """
+            @type data: object
+            @return: object
+            """
+            try:
+                return call(data)
+            except SchemaError as x:
+                raise SchemaError([None] + x.autos, [error] + x.errors)
+            except BaseException as x:
+                raise SchemaError(SchemaMessage('%s(%r) raised %r', call.__name__, data, x), error)
+
+        return validate_use
+
+    if kind is And:
+        steps = [compile_schema(s, validator._error) for s in validator._args]
+
+        def validate_and(data):
+            """
+            @type data: object
+            @return: object
+            """
+            for step in steps:
+                data = step(data)
+
+            return data
+
+        return validate_and
+
+    if kind is Or:
+        options = [compile_schema(s, validator._error) for s in validator._args]
+
+        def validate_or(data):
+            """
+            @type data: object
+            @return: object
+            """
+            x = SchemaError([], [])
+
+            for option in options:
+                try:
+                    return option(data)
+                except SchemaError as _x:
+                    x = _x
+
+            raise SchemaError([SchemaMessage('%r did not validate %r', validator, data)] + x.autos, [validator._error] + x.errors)
+
+        return validate_or
+
+    if isinstance(validator, Schema):
+        return validator.compile()
+
+    return validator.validate
+
+
+def convert_arguments(arguments, types):
+    """
+    Convert docopt argument values with the converters in types, keyed by argument name,
+    raises DocoptExit for a value that does not convert
+    @type arguments: dict
+    @type types: dict
+    @return: None
+    """
+    for k in arguments:
+        convert = types.get(argument_name(k))
+        value = arguments[k]
+
+        if convert is None or value is None or isinstance(value, bool):
+            continue
+
+        try:
+            arguments[k] = [convert(v) for v in value] if isinstance(value, list) else convert(value)
+        except ValueError:
+            raise DocoptExit("%s expects %s, got %r" % (k, getattr(convert, "__name__", convert), value))
+
+
+def delete_directory(dirpath, excluded_file_names):
+    """
+    @type dirpath: str
+    @type excluded_file_names: list, tuple
+    @return: int
+    """
+    for rootpath, dirs, files in os.walk(dirpath):
+        for f in files:
+            fp = os.path.join(rootpath, f)
+
+            for exname in excluded_file_names:
+                if not os.path.basename(fp) == exname:
+                    if os.path.exists(fp):
+                        os.remove(fp)
+
+    dirpaths = []
+
+    for rootpath, dirs, files in os.walk(dirpath):
+        dirpaths.append(rootpath)
+
+    dirpaths.sort(key=lambda x: len(x.split("/")))
+    dirpaths.reverse()
+
+    for rootpath in dirpaths:
+        if dirpath != rootpath:
+            if os.path.exists(rootpath):
+                os.removedirs(rootpath)
+
+    return len(list(os.walk(dirpath)))
+
+
+def entry_point_commands(group):
+    """
+    The names and "module:class" paths of the entry points in group, read from the
+    installed package metadata without importing them
+    @type group: str
+    @return: dict
+    """
+    try:
+        from importlib import metadata
+    except ImportError:
+        metadata = importlib.import_module("importlib_metadata")
+
+    entry_points = metadata.entry_points()
+
+    if hasattr(entry_points, "select"):
+        entry_points = entry_points.select(group=group)
+    else:
+        entry_points = entry_points.get(group, [])
+
+    return dict((entry_point.name, entry_point.value) for entry_point in entry_points)
+
+
+def flattened(mylist, newlist):
+    """
+    @type mylist: list
+    @type newlist: list
+    @return: None
+    """
+    for item in mylist:
+        if isinstance(item, list):
+            flattened(item, newlist)
+        else:
+            newlist.append(item)
+
+
+def help_variants(styled):
+    """
+    @type styled: str
+    @return: tuple
+    """
+    return styled, ANSI_ESCAPE.sub("", styled)
+
+
+def help_request(argv, doc):
+    """
+    "version" when argv asks for --version, else "help" for a -h or --help that doc
+    declares as a flag, else None. Only looks before --, and steps over the values
+    of the options doc declares with an argument, so -h --host=<host> stays a host.
+    @type argv: list
+    @type doc: str
+    @return: str, None
+    """
+    longs, shorts = option_table(doc)
+    request = None
+    argv = iter(argv)
+
+    for arg in argv:
+        arg = str(arg)
+
+        if arg == "--":
+            break
+
+        if arg.startswith("--"):
+            name, eq, _ = arg.partition("=")
+            option = longs.get(name)
+
+            if option is None:
+                matches = [longs[long] for long in longs if long.startswith(name)]
+                option = matches[0] if len(matches) == 1 else None
+
+            if name == "--version" or (option is not None and option.long == "--version"):
+                request = "version"
+            elif option is not None and option.argcount:
+                if not eq:
+                    next(argv, None)
+            elif option is not None and option.name in ("-h", "--help") and request is None:
+                request = "help"
+        elif arg.startswith("-") and arg != "-":
+            for i, char in enumerate(arg[1:]):
+                option = shorts.get("-" + char)
+
+                if option is None:
+                    continue
+
+                if option.argcount:
+                    if i == len(arg) - 2:
+                        next(argv, None)
+
+                    break
+
+                if option.name in ("-h", "--help") and request is None:
+                    request = "help"
+
+    return request
+
+
+def normalize_path(key, value, resolver=None):
+    """
+    Expand ~, . and ./ in values that look like paths, or whose key says they are one.
+    Pass one resolver for all values of a parse to look up home and cwd only once.
+    @type key: str
+    @type value: object
+    @type resolver: PathResolver, None
+    @return: object
+    """
+    trypath = False
+
+    if isinstance(value, str):
+        trypath = "~" in value or "/" in value
+
+    if trypath is False:
+        trypath = "folder" in key or "path" in key
+
+    if trypath:
+        if hasattr(value, "replace"):
+            if resolver is None:
+                resolver = PathResolver()
+
+            if "~" in value:
+                value = value.replace("~", resolver.home)
+
+            if value.strip() == ".":
+                value = resolver.cwd
+
+            if "./" in value.strip():
+                value = resolver.abspath(value)
+
+            if value.rstrip("/").strip() != "/":
+                value = value.rstrip("/").strip()
+
+        if hasattr(value, "strip") and value.strip() == "":
+            value = "/"
+
+    return value
+
+
+def leading_tokens(argv, commands):
+    """
+    The tokens of argv before the first one that names one of commands, those after it
+    belong to the subcommand
+    @type argv: list
+    @type commands: dict
+    @return: list
+    """
+    for index, arg in enumerate(argv):
+        if arg in commands:
+            return argv[:index]
+
+    return argv
+
+
+def load_subcommand(target):
+    """
+    The Arguments subclass a "module:class" path, or the path of a ("module:class",
+    summary) pair, names, its module imported on first use, or target itself when it
+    is a class
+    @type target: type, str, tuple
+    @return: type
+    """
+    if isinstance(target, type):
+        return target
+
+    if isinstance(target, tuple):
+        target = target[0]
+
+    module, _, name = target.partition(":")
+    target = importlib.import_module(module)
+
+    for attribute in name.split("."):
+        target = getattr(target, attribute)
+
+    return target
+
+
+def normalize_doc(doc, commands=()):
+    """
+    Strip the indentation of doc and sort its commands table, with the (name, summary)
+    pairs of commands added to it when doc does not list them itself. The result is
+    kept in memory for every later Arguments instance with the same doc, and in
+    the disk cache of fallbackdocopt when that is enabled
+    @type doc: str
+    @type commands: tuple
+    @return: str
+    """
+    kind = ("doc", commands) if commands else "doc"
+    newdoc = doc_cache.get((kind, doc))
+
+    if newdoc is not None:
+        return newdoc
+
+    store = spec_cache.store
+    key = doc + "\n" + repr(commands) if commands else doc
+
+    if store is not None:
+        newdoc = store.load("doc", key)
+
+    if newdoc is None:
+        newdoc = remove_extra_indentation(doc, "usage")
+
+        if commands:
+            lines = newdoc.split("\n")
+            listed = set(line.split()[0] for line in lines if line.startswith(" ") and line.strip())
+
+            if "commands:" not in newdoc.lower():
+                lines.extend(["", "Commands:"])
+
+            lines.extend("    %s  %s" % (name, summary) for name, summary in commands if name not in listed)
+            newdoc = "\n".join(lines)
+
+        newdoc = Arguments.reorder_commandlist(newdoc)
+
+        if store is not None:
+            store.save("doc", key, newdoc)
+
+    cache_doc(kind, doc, newdoc)
+    return newdoc
+
+
+def not_exists(path):
+    """
+    @type path: str
+    @return: None
+    """
+    return not exists(path)
+
+
+def option_table(doc):
+    """
+    The options doc declares, by long and by short name, read from the options
+    section only so a help request is answered without compiling the usage.
+    @type doc: str
+    @return: tuple
+    """
+    table = doc_cache.get(("options", doc))
+
+    if table is None:
+        longs, shorts = {}, {}
+
+        for option in parse_defaults(doc):
+            if option.long:
+                longs[option.long] = option
+
+            if option.short:
+                shorts[option.short] = option
+
+        table = longs, shorts
+        cache_doc("options", doc, table)
+
+    return table
+
+
+def parse_file(doc, infile, outfile, validateschema=None, workers=None, chunksize=1000, jsonl=None):
+    """
+    Parse a file of command lines, one per line, and write one JSON result per line to outfile
+    in input order. Lines are shell split, or read as JSON (an argv list, a command line string
+    or an object with an argv key) when jsonl is set or infile ends with .jsonl. Chunks of lines
+    are parsed in a process pool whose workers compile the doc once each, with at most two
+    chunks per worker in flight so memory stays bounded. workers=1 parses in this process.
+    Without fork the schema has to be picklable.
+    @type doc: str
+    @type infile: str, file
+    @type outfile: str, file
+    @type validateschema: Schema, None
+    @type workers: int, None
+    @type chunksize: int
+    @type jsonl: bool, None
+    @return: int
+    """
+    if jsonl is None:
+        jsonl = str(getattr(infile, "name", infile)).endswith(".jsonl")
+
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+
+    opened = []
+
+    if not hasattr(infile, "read"):
+        infile = io.open(infile, encoding="utf-8")
+        opened.append(infile)
+
+    if not hasattr(outfile, "write"):
+        outfile = io.open(outfile, "w", encoding="utf-8")
+        opened.append(outfile)
+
+    def chunks():
+        """
+        chunks
+        """
+        chunk = []
+
+        for lineno, line in enumerate(infile, 1):
+            line = line.strip()
+
+            if line:
+                chunk.append((lineno, line))
+
+                if len(chunk) == chunksize:
+                    yield chunk
+                    chunk = []
+
+        if chunk:
+            yield chunk
+
+    def write(records):
+        """
+        @type records: list
+        @return: int
+        """
+        for record in records:
+            outfile.write(record)
+            outfile.write("\n")
+
+        return len(records)
+
+    count = 0
+    spec = compile_spec(normalize_doc(doc))
+
+    try:
+        if workers == 1:
+            parse_file_init(spec, validateschema, jsonl)
+
+            for chunk in chunks():
+                count += write(parse_file_chunk(chunk))
+        else:
+            with futures.ProcessPoolExecutor(workers, initializer=parse_file_init, initargs=(spec, validateschema, jsonl)) as pool:
+                pending = collections.deque()
+
+                for chunk in chunks():
+                    pending.append(pool.submit(parse_file_chunk, chunk))
+
+                    if len(pending) >= 2 * workers:
+                        count += write(pending.popleft().result())
+
+                while pending:
+                    count += write(pending.popleft().result())
+    finally:
+        for fileobject in opened:
+            fileobject.close()
+
+    return count
+
+
+def parse_file_chunk(chunk):
+    """
+    Parse (lineno, line) pairs with the spec set by parse_file_init, returns json lines
+    @type chunk: list
+    @return: list
+    """
+    spec, schema, jsonl = parse_file_state["spec"], parse_file_state["schema"], parse_file_state["jsonl"]
+    records = []
+    parsed = []
+
+    for lineno, line in chunk:
+        try:
+            argv = split_command_line(line, jsonl)
+        except ValueError as ex:
+            records.append({"line": lineno, "ok": False, "error": str(ex)})
+        else:
+            record = {"line": lineno, "argv": argv}
+            records.append(record)
+            parsed.append(record)
+
+    for record, result in zip(parsed, parse_spec(spec, [record["argv"] for record in parsed], schema)):
+        record["ok"] = result.ok
+
+        if result.ok:
+            record["positional"] = result.positional
+            record["options"] = result.options
+        else:
+            record["error"] = result.message
+            record["suggestions"] = list(result.suggestions)
+
+    return [json.dumps(record, default=str, sort_keys=True) for record in records]
+
+
+def parse_file_init(spec, validateschema, jsonl):
+    """
+    Process initializer of parse_file, keeps the spec compiled once by parse_file for
+    every chunk of the worker
+    @type spec: Spec
+    @type validateschema: Schema, None
+    @type jsonl: bool
+    @return: None
+    """
+    parse_file_state["spec"] = spec
+    parse_file_state["schema"] = validateschema
+    parse_file_state["jsonl"] = jsonl
+
+
+def parse_many(doc, argvs, validateschema=None):
+    """
+    Parse many argument vectors against one doc, which is normalized and compiled once.
+    Yields a ParseResult per argv, or a ParseError when it does not match the doc or the
+    schema, never prints help or exits
+    @type doc: str
+    @type argvs: iterable
+    @type validateschema: Schema, None
+    @return: generator
+    """
+    for result in parse_spec(compile_spec(normalize_doc(doc)), argvs, validateschema):
+        yield result
+
+
+def parse_spec(spec, argvs, validateschema=None):
+    """
+    parse_many against a compiled spec
+    @type spec: Spec
+    @type argvs: iterable
+    @type validateschema: Schema, None
+    @return: generator
+    """
+    typed = set(argument_name(k) for k, name in spec.types)
+
+    for argv in argvs:
+        argv = list(argv)
+
+        try:
+            arguments = dict(spec.parse(argv, help=False))
+            resolver = PathResolver()
+
+            for k in arguments:
+                arguments[k] = normalize_path(k, arguments[k], resolver)
+
+            arguments = prepare_arguments(arguments, validateschema)
+        except (DocoptExit, SchemaError) as ex:
+            yield ParseError(argv, ex)
+            continue
+
+        options, positional = Arguments.sort_arguments(arguments, typed)
+        yield ParseResult(argv, positional, options)
+
+
+def prepare_arguments(arguments, schema):
+    """
+    Validate docopt arguments against schema and rename their keys to the pa_ and op_ form
+    @type arguments: dict
+    @type schema: Schema, None
+    @return: dict
+    """
+    validate_arguments(arguments, schema)
+    return dict((x.replace("<", "pa_").replace(">", "").replace("--", "op_").replace("-", "_"), y) for x, y in arguments.items())
 
 
 def priority(s):
@@ -1212,4 +2696,180 @@ def priority(s):
     else:
         return COMPARABLE
 
-standard_library.install_aliases()
+
+def split_subcommand(argv, commands, spec):
+    """
+    Index of the first positional token of argv that names one of commands, else None.
+    The values of options that spec declares with an argument are skipped, as are the
+    commands of its own usage, such as the name a routed subcommand starts with.
+    @type argv: list
+    @type commands: dict
+    @type spec: Spec
+    @return: int, None
+    """
+    options = spec.option_index
+    positional = False
+    index = 0
+
+    while index < len(argv):
+        arg = argv[index]
+
+        if positional is False and arg == "--":
+            positional = True
+        elif positional is False and arg.startswith("--"):
+            found = options.long(arg) or options.prefixed(arg)
+
+            if "=" not in arg and len(found) == 1 and found[0].argcount:
+                index += 1
+        elif positional is False and arg.startswith("-") and arg != "-":
+            for i in range(1, len(arg)):
+                found = options.short("-" + arg[i])
+
+                if found and found[0].argcount:
+                    if i == len(arg) - 1:
+                        index += 1
+
+                    break
+        elif arg in commands:
+            return index
+        elif arg not in spec.commands:
+            return None
+
+        index += 1
+
+    return None
+
+
+def split_command_line(line, jsonl=False):
+    """
+    Split a recorded command line into an argv list, raises ValueError when it cannot
+    @type line: str
+    @type jsonl: bool
+    @return: list
+    """
+    if jsonl:
+        line = json.loads(line)
+
+        if isinstance(line, dict):
+            if "argv" not in line:
+                raise ValueError("no argv in json object")
+
+            line = line["argv"]
+
+            if not isinstance(line, list):
+                raise ValueError("argv in json object is not a list")
+
+        if isinstance(line, list):
+            return [str(x) for x in line]
+
+        if not isinstance(line, type("")):
+            raise ValueError("json line is not a list or object")
+
+    return shlex.split(line)
+
+
+def stat_path(path):
+    """
+    @type path: str
+    @return: os.stat_result, None
+    """
+    try:
+        return os.stat(path)
+    except OSError:
+        return None
+
+
+def stat_paths(paths, workers=None):
+    """
+    os.stat of every path, None where a path does not exist, in the order of paths.
+    The thread pool only pays off on a high-latency filesystem such as NFS or SMB, where
+    the stats overlap; on a local disk it is several times slower than stat'ing one by
+    one. Lists shorter than STAT_POOL_SIZE, or workers=1, are stat'ed serially.
+    @type paths: list
+    @type workers: int, None
+    @return: list
+    """
+    if workers == 1 or len(paths) < STAT_POOL_SIZE:
+        return [stat_path(path) for path in paths]
+
+    with futures.ThreadPoolExecutor(workers) as pool:
+        return list(pool.map(stat_path, paths))
+
+
+def subcommand_manifest(commands):
+    """
+    (name, summary) of the subcommands in commands, sorted by name, without importing
+    anything: the summary declared with a ("module:class", summary) path, the first
+    line of the class docstring for a class, nothing for a bare path
+    @type commands: dict
+    @return: tuple
+    """
+    manifest = []
+
+    for name in sorted(commands):
+        target = commands[name]
+
+        if isinstance(target, type):
+            manifest.append((name, subcommand_summary(target)))
+        elif isinstance(target, tuple):
+            manifest.append((name, target[1]))
+        else:
+            manifest.append((name, ""))
+
+    return tuple(manifest)
+
+
+def subcommand_summary(subclass):
+    """
+    @type subclass: type
+    @return: str
+    """
+    for line in (subclass.__doc__ or "").split("\n"):
+        if line.strip():
+            return line.strip()
+
+    return ""
+
+
+def validate_arguments(arguments, schema):
+    """
+    Drop the -- marker from docopt arguments and validate them against schema,
+    returns the validated values keyed like the schema
+    @type arguments: dict
+    @type schema: Schema, None
+    @return: dict
+    """
+    if "--" in arguments:
+        del arguments["--"]
+
+    if schema is None:
+        return {}
+
+    data = dict((argument_name(x), y) for x, y in arguments.items())
+    schema_keys = schema.get_keys()
+
+    for k in list(data.keys()):
+        if k not in schema_keys:
+            schema.add_void_schema_item(k)
+
+    return schema.compile()(data)
+
+def write_help(variants, stream=None):
+    """
+    Write the styled variant of help to a terminal and the plain one to anything
+    else, in one write
+    @type variants: tuple
+    @type stream: file, None
+    @return: None
+    """
+    if stream is None:
+        stream = sys.stdout
+
+    styled, plain = variants
+    isatty = getattr(stream, "isatty", None)
+    stream.write((styled if isatty is not None and isatty() else plain) + "\n")
+
+
+if not is_python3():
+    from future import standard_library
+    standard_library.install_aliases()
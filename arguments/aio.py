@@ -0,0 +1,138 @@
+# coding=utf-8
+"""
+asyncio front-end for parsing streams of argument vectors, python 3 only,
+loaded on first use of arguments.parse_async
+"""
+import inspect
+import asyncio
+
+from arguments import argument_name, compile_spec, normalize_doc, normalize_path, prepare_arguments, validate_arguments
+from arguments import Arguments, PathResolver, DocoptExit, ParseError, ParseResult, SchemaError
+
+
+def compile_doc(doc):
+    """
+    @type doc: str
+    @return: Spec
+    """
+    return compile_spec(normalize_doc(doc))
+
+
+def parse_argv(spec, argv, schema):
+    """
+    Parse and validate one argv, returns a ParseError, a ParseResult or, when validators
+    returned awaitables, the parsed arguments with the awaitables still to resolve
+    @type spec: Spec
+    @type argv: list
+    @type schema: Schema, None
+    @return: ParseError, ParseResult, tuple
+    """
+    try:
+        arguments = dict(spec.parse(argv, help=False))
+        resolver = PathResolver()
+
+        for k in arguments:
+            arguments[k] = normalize_path(k, arguments[k], resolver)
+
+        validated = validate_arguments(arguments, schema)
+    except (DocoptExit, SchemaError) as ex:
+        return ParseError(argv, ex)
+
+    awaitables = dict((k, v) for k, v in validated.items() if inspect.isawaitable(v))
+
+    if awaitables:
+        return arguments, awaitables
+
+    return result(spec, argv, arguments)
+
+
+async def parse_async(doc, argvs, validateschema=None, limit=16):
+    """
+    Parse argument vectors from an async iterator against doc, compiled once off the event
+    loop. Awaitables returned by Use validators are awaited concurrently for at most limit
+    argvs at a time, reading from argvs pauses while that many are in flight. Yields a
+    ParseResult or ParseError per argv as soon as it is complete, so not in input order.
+    @type doc: str
+    @type argvs: collections.abc.AsyncIterator
+    @type validateschema: Schema, None
+    @type limit: int
+    @return: collections.abc.AsyncIterator
+    """
+    loop = asyncio.get_running_loop()
+    spec = await loop.run_in_executor(None, compile_doc, doc)
+    argvs = argvs.__aiter__()
+    reader = None
+    exhausted = False
+    validating = set()
+
+    try:
+        while True:
+            if reader is None and not exhausted and len(validating) < limit:
+                reader = asyncio.ensure_future(argvs.__anext__())
+
+            waiting = set(validating)
+
+            if reader is not None:
+                waiting.add(reader)
+
+            if not waiting:
+                break
+
+            done, _ = await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+
+            for task in done:
+                if task is not reader:
+                    validating.discard(task)
+                    yield task.result()
+                    continue
+
+                reader = None
+
+                try:
+                    argv = list(task.result())
+                except StopAsyncIteration:
+                    exhausted = True
+                    continue
+
+                parsed = parse_argv(spec, argv, validateschema)
+
+                if isinstance(parsed, tuple):
+                    validating.add(asyncio.ensure_future(resolve(spec, argv, *parsed)))
+                else:
+                    yield parsed
+    finally:
+        for task in validating | set([reader] if reader is not None else []):
+            task.cancel()
+
+
+async def resolve(spec, argv, arguments, awaitables):
+    """
+    Await the validator results of one argv concurrently
+    @type spec: Spec
+    @type argv: list
+    @type arguments: dict
+    @type awaitables: dict
+    @return: ParseError, ParseResult
+    """
+    keys = list(awaitables)
+    values = await asyncio.gather(*[awaitables[k] for k in keys], return_exceptions=True)
+
+    for k, value in zip(keys, values):
+        if isinstance(value, SchemaError):
+            return ParseError(argv, value)
+
+        if isinstance(value, BaseException):
+            return ParseError(argv, SchemaError("invalid value for key %r, validator raised %r" % (k, value), None))
+
+    return result(spec, argv, arguments)
+
+
+def result(spec, argv, arguments):
+    """
+    @type spec: Spec
+    @type argv: list
+    @type arguments: dict
+    @return: ParseResult
+    """
+    options, positional = Arguments.sort_arguments(prepare_arguments(arguments, None), set(argument_name(k) for k, name in spec.types))
+    return ParseResult(argv, positional, options)
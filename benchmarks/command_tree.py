@@ -0,0 +1,78 @@
+# coding=utf-8
+"""
+A nested tree of Arguments subclasses parsed the classbased way, every level parsing the
+whole argv again, against Arguments.route handing every level its own slice of argv
+
+Usage:
+    python benchmarks/command_tree.py [<depth>] [<args>]
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from arguments import Arguments
+
+
+def make_level(words, routed):
+    """
+    @type words: list
+    @type routed: bool
+    @return: type
+    """
+    prefix = words[-1:] if routed else words
+    doc = "Level %d\nUsage:\n    prog %s [--verbose] <command> [<args>...]\n" % (len(words), " ".join(prefix))
+
+    class Level(Arguments):
+        """
+        Level
+        """
+        def __init__(self, argvalue=None):
+            """
+            @type argvalue: list, None
+            @return: None
+            """
+            super().__init__(doc, argvalue=argvalue)
+
+    return Level
+
+
+def main():
+    """
+    main
+    """
+    depth = int(sys.argv[1]) if len(sys.argv) > 1 else 6
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    words = ["c%d" % i for i in range(depth)]
+    argv = words + ["--verbose"] + ["arg%d" % i for i in range(count)]
+    levels = [make_level(words[:i], False) for i in range(depth + 1)]
+    routed = [make_level(words[:i], True) for i in range(depth + 1)]
+
+    for i in range(depth):
+        routed[i].subcommand(words[i])(routed[i + 1])
+
+    def reparsed():
+        """
+        reparsed
+        """
+        for level in levels:
+            args = level(argvalue=list(argv))
+
+        return args
+
+    def route():
+        """
+        route
+        """
+        return routed[0].route(argv)
+
+    assert reparsed().args == route().args
+    print("depth       : %d, %d args" % (depth, count))
+
+    for name, run in (("per level", reparsed), ("route", route)):
+        print("%-12s: %.3f ms" % (name, 1000 * min(timeit.repeat(run, number=20, repeat=3)) / 20))
+
+
+if __name__ == "__main__":
+    main()
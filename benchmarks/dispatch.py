@@ -0,0 +1,50 @@
+# coding=utf-8
+"""
+Matching a usage section with hundreds of command lines, through the
+command index of the compiled spec versus trying every alternative
+
+Usage:
+    python benchmarks/dispatch.py [<commands>]
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fallbackdocopt import Left, Spec, TokenStream, DocoptExit, parse_argv
+
+
+def make_doc(commands):
+    """
+    @type commands: int
+    @return: str
+    """
+    lines = ["Ops tool", "Usage:"]
+
+    for i in range(commands):
+        lines.append("    prog cmd%d [-v] <arg> [<rest>...]" % i)
+
+    lines.extend(["", "Options:", "    -v --verbose  Verbose mode."])
+    return "\n".join(lines) + "\n"
+
+
+def main():
+    """
+    main
+    """
+    commands = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    spec = Spec(make_doc(commands))
+    argv = ["cmd%d" % (commands // 2), "-v", "x", "y", "z"]
+    tokens = parse_argv(TokenStream(argv, DocoptExit), list(spec.options))
+    assert spec.index.match(Left(tokens))[0]
+    number = 200
+    indexed = timeit.timeit(lambda: spec.index.match(Left(tokens)), number=number) / number
+    full = timeit.timeit(lambda: spec.pattern.match(Left(tokens)), number=number) / number
+    print("usage lines : %d" % commands)
+    print("full search : %.3f ms" % (full * 1000))
+    print("indexed     : %.3f ms" % (indexed * 1000))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# coding=utf-8
+"""
+Instantiating the same Arguments subclass over and over, with the normalized doc and
+commands table computed per instance against once per doc
+
+Usage:
+    python benchmarks/doc_cache.py [<commands>]
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import arguments
+from arguments import Arguments
+
+
+def make_doc(count):
+    """
+    @type count: int
+    @return: str
+    """
+    commands = "\n".join("                cmd%d    Command number %d" % (i, i) for i in range(count))
+    return """
+            Tool.
+            Usage:
+                tool [options] <command> [<args>...]
+
+            Options:
+                -v --verbose    Verbose mode.
+
+            Commands:
+%s
+
+            author: me
+    """ % commands
+
+
+def main():
+    """
+    main
+    """
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    doc = make_doc(count)
+
+    class Tool(Arguments):
+        """
+        Tool
+        """
+        def __init__(self):
+            """
+            __init__
+            """
+            super(Tool, self).__init__(doc, argvalue=["cmd1", "x"])
+
+    def uncached():
+        """
+        uncached
+        """
+        arguments.doc_cache.clear()
+        return Tool()
+
+    print("commands    : %d" % count)
+    uncached()
+
+    for name, run in (("per instance", uncached), ("per doc", Tool)):
+        print("%-12s: %.3f ms" % (name, 1000 * min(timeit.repeat(run, number=50, repeat=3)) / 50))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+# coding=utf-8
+"""
+Event loop lag while a stream of commands is parsed and validated, with Arguments called on
+the loop against parse_async with an awaitable validator. A ticker task sleeps 1ms at a time
+and records how late it wakes up.
+
+Usage:
+    python benchmarks/event_loop_lag.py [<commands>]
+"""
+import os
+import sys
+import time
+import asyncio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from arguments import Arguments, Schema, Use, parse_async
+
+DOC = """
+    Chatops bot
+    Usage:
+        bot deploy <app> [--env=<env>] [--force]
+        bot rollback <app> [<version>]
+        bot status [<app>...]
+%s
+    Options:
+        -e --env=<env>  Environment [default: staging].
+        -f --force      Deploy even when checks fail.
+""" % "".join("        bot task%d <app> [--force]\n" % i for i in range(10))
+
+ARGVS = [["deploy", "web", "--env=prod"], ["rollback", "api", "12"], ["status", "web", "api"], ["deploy", "worker", "-f"]]
+
+
+async def ticker(lags, stop):
+    """
+    @type lags: list
+    @type stop: asyncio.Event
+    @return: None
+    """
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.001)
+        lags.append(time.perf_counter() - start - 0.001)
+
+
+async def commands(count):
+    """
+    @type count: int
+    @return: collections.abc.AsyncIterator
+    """
+    for i in range(count):
+        await asyncio.sleep(0)
+        yield list(ARGVS[i % len(ARGVS)])
+
+
+async def lookup(app):
+    """
+    @type app: list
+    @return: list
+    """
+    await asyncio.sleep(0.001)
+    return app
+
+
+async def with_arguments(count):
+    """
+    @type count: int
+    @return: None
+    """
+    async for argv in commands(count):
+        Arguments(DOC, validateschema=Schema({"app": Use(list)}), argvalue=argv)
+
+
+async def with_parse_async(count):
+    """
+    @type count: int
+    @return: None
+    """
+    async for result in parse_async(DOC, commands(count), Schema({"app": Use(lookup)})):
+        assert result.ok
+
+
+async def measure(name, parse, count):
+    """
+    @type name: str
+    @type parse: function
+    @type count: int
+    @return: None
+    """
+    lags = []
+    stop = asyncio.Event()
+    task = asyncio.ensure_future(ticker(lags, stop))
+    start = time.perf_counter()
+    await parse(count)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await task
+    lags.sort()
+    print("%-16s %6.0f cmds/s  lag p50 %6.2fms  p99 %6.2fms  max %6.2fms" % (name, count / elapsed, lags[len(lags) // 2] * 1000, lags[int(len(lags) * .99)] * 1000, lags[-1] * 1000))
+
+
+def main():
+    """
+    main
+    """
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(measure("Arguments", with_arguments, count))
+    loop.run_until_complete(measure("parse_async", with_parse_async, count))
+    loop.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# coding=utf-8
+"""
+print_commandline_help for a doc with many commands, rendered on every call against
+rendered once and written with a single write, to a terminal and to a pipe
+
+Usage:
+    python benchmarks/help_render.py [<commands>]
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import arguments
+from arguments import Arguments, normalize_doc
+
+
+class Output(object):
+    """
+    Discards what is written, counts the writes
+    """
+    def __init__(self, tty):
+        """
+        @type tty: bool
+        @return: None
+        """
+        self.tty = tty
+        self.writes = 0
+
+    def isatty(self):
+        """
+        isatty
+        """
+        return self.tty
+
+    def write(self, text):
+        """
+        @type text: str
+        @return: None
+        """
+        self.writes += 1
+
+    def flush(self):
+        """
+        flush
+        """
+
+
+def main():
+    """
+    main
+    """
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    commands = "\n".join("        cmd%d    Command number %d" % (i, i) for i in range(count))
+    doc = normalize_doc("""
+        Tool.
+        Usage:
+            tool [options] <command> [<args>...]
+
+        Options:
+            -h --help       Show this screen.
+
+        Commands:
+%s
+    """ % commands)
+    args = Arguments.__new__(Arguments)
+    args.m_doc = doc
+    args.command = "cmd7"
+    args.m_commandline_help = {"cmd7": "Command number seven, in detail"}
+    stdout = sys.stdout
+    print("commands    : %d" % count)
+
+    for tty in (True, False):
+        output = Output(tty)
+
+        def rendered():
+            """
+            rendered
+            """
+            arguments.doc_cache.clear()
+            args.print_commandline_help()
+
+        try:
+            sys.stdout = output
+            timings = [1000 * min(timeit.repeat(run, number=20, repeat=3)) / 20 for run in (rendered, args.print_commandline_help)]
+        finally:
+            sys.stdout = stdout
+
+        for name, timing in zip(("render", "cached"), timings):
+            print("%-12s: %.3f ms (%s, %d writes per call)" % (name, timing, "tty" if tty else "pipe", output.writes // 120))
+
+
+if __name__ == "__main__":
+    main()
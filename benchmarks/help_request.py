@@ -0,0 +1,84 @@
+# coding=utf-8
+"""
+Answering --help through the full parse against the pre-scan of argv that serves the
+cached help text, for a doc with a number of commands and options
+
+Usage:
+    python benchmarks/help_request.py [<commands>]
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from arguments import Arguments, spec_cache
+
+
+def make_doc(count):
+    """
+    @type count: int
+    @return: str
+    """
+    options = "\n".join("                --opt%d=<v%d>    Option number %d." % (i, i, i) for i in range(count))
+    commands = "\n".join("                cmd%d    Command number %d" % (i, i) for i in range(count))
+    return """
+            Tool.
+            Usage:
+                tool [options] <command> [<args>...]
+
+            Options:
+                -h --help       Show this screen.
+%s
+
+            Commands:
+%s
+    """ % (options, commands)
+
+
+def main():
+    """
+    main
+    """
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    doc = make_doc(count)
+    print_help_request = Arguments.print_help_request
+
+    def run():
+        """
+        run
+        """
+        try:
+            Arguments(doc, argvalue=["cmd1", "--help"])
+        except SystemExit:
+            pass
+
+    def full_parse(self):
+        """
+        full_parse
+        """
+        spec_cache.clear()
+
+    stdout = sys.stdout
+    timings = []
+
+    try:
+        sys.stdout = open(os.devnull, "w")
+
+        for method in (full_parse, print_help_request):
+            Arguments.print_help_request = method
+            run()
+            timings.append(1000 * min(timeit.repeat(run, number=20, repeat=3)) / 20)
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+        Arguments.print_help_request = print_help_request
+
+    print("commands    : %d" % count)
+
+    for name, timing in zip(("full parse", "pre-scan"), timings):
+        print("%-12s: %.3f ms" % (name, timing))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# coding=utf-8
+"""
+Import time budget for the arguments package, measured with python -X importtime
+in fresh interpreters. Exits with status 1 when the median is over budget.
+
+Usage:
+    python benchmarks/import_time.py [<budget_ms>] [<runs>]
+"""
+import os
+import sys
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LAZY_MODULES = ["yaml", "consoleprinter", "pickle", "json", "future"]
+
+
+def import_time(module):
+    """
+    @type module: str
+    @return: tuple
+    """
+    env = os.environ.copy()
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    env["PYTHONPATH"] = ROOT
+    code = "import %s, sys; print(','.join(m for m in %r if m in sys.modules))" % (module, LAZY_MODULES)
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, check=True)
+    cumulative = 0
+
+    for line in proc.stderr.splitlines():
+        fields = line.split("|")
+
+        if len(fields) == 3 and fields[2].strip() == module:
+            cumulative = int(fields[1])
+
+    loaded = [x for x in proc.stdout.strip().split(",") if x]
+    return cumulative / 1000.0, loaded
+
+
+def main():
+    """
+    main
+    """
+    budget = float(sys.argv[1]) if len(sys.argv) > 1 else 60.0
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 7
+
+    # first run writes the bytecode cache so compile time is not measured
+    import_time("arguments")
+    timings = []
+    loaded = []
+
+    for _ in range(runs):
+        ms, loaded = import_time("arguments")
+        timings.append(ms)
+
+    timings.sort()
+    median = timings[len(timings) // 2]
+    print("import arguments : %.1f ms median of %d runs (budget %.1f ms)" % (median, runs, budget))
+
+    if loaded:
+        print("eagerly imported : " + ", ".join(loaded))
+
+    if median > budget or loaded:
+        print("FAILED")
+        return 1
+
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
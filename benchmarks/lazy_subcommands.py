@@ -0,0 +1,109 @@
+# coding=utf-8
+"""
+Startup of a suite of many tool modules, each in a fresh interpreter: importing every
+tool before dispatch against registering them as module:class paths with declared
+summaries, for a dispatch and for --help
+
+Usage:
+    python benchmarks/lazy_subcommands.py [<tools>]
+"""
+import os
+import sys
+import time
+import shutil
+import tempfile
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TOOL = '''
+from arguments import Arguments
+
+%s
+
+
+class Tool%d(Arguments):
+    """
+    Tool number %d
+    """
+    def __init__(self, argvalue=None):
+        super().__init__("Tool\\nUsage:\\n  suite tool%d <target>\\n", argvalue=argvalue)
+'''
+
+SUITE = '''
+import sys
+sys.path[:0] = [%r, %r]
+from arguments import Arguments
+
+
+class Suite(Arguments):
+    """
+    Suite
+    """
+    def __init__(self, argvalue=None):
+        super().__init__("Suite\\nUsage:\\n  suite [options] <tool> [<args>...]\\n\\nOptions:\\n  -h --help  Help.\\n", argvalue=argvalue)
+
+
+commands = dict(("tool%%d" %% i, ("tools.tool%%d:Tool%%d" %% (i, i), "Tool number %%d" %% i)) for i in range(%d))
+
+if sys.argv[1] == "eager":
+    import importlib
+    commands = dict((name, getattr(importlib.import_module(path.split(":")[0]), path.split(":")[1])) for name, (path, summary) in commands.items())
+
+Suite.add_subcommands(commands)
+
+try:
+    Suite.route(sys.argv[2:])
+except SystemExit:
+    pass
+'''
+
+
+def run(script, *argv):
+    """
+    @type script: str
+    @type argv: tuple
+    @return: float
+    """
+    timings = []
+
+    for _ in range(3):
+        start = time.time()
+        subprocess.check_call([sys.executable, script] + list(argv), stdout=subprocess.DEVNULL)
+        timings.append(time.time() - start)
+
+    return 1000 * min(timings)
+
+
+def main():
+    """
+    main
+    """
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 150
+    folder = tempfile.mkdtemp()
+
+    try:
+        os.mkdir(os.path.join(folder, "tools"))
+        open(os.path.join(folder, "tools", "__init__.py"), "w").close()
+        body = "\n".join("def helper%d(value):\n    return [value] * %d\n" % (i, i) for i in range(200))
+
+        for i in range(count):
+            with open(os.path.join(folder, "tools", "tool%d.py" % i), "w") as f:
+                f.write(TOOL % (body, i, i, i))
+
+        script = os.path.join(folder, "suite.py")
+
+        with open(script, "w") as f:
+            f.write(SUITE % (ROOT, folder, count))
+
+        run(script, "eager", "--help")
+        print("tools       : %d" % count)
+
+        for name, argv in (("eager", ("eager", "tool3", "x")), ("lazy", ("lazy", "tool3", "x")), ("lazy help", ("lazy", "--help"))):
+            print("%-12s: %.0f ms" % (name, run(script, *argv)))
+    finally:
+        shutil.rmtree(folder)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+# coding=utf-8
+"""
+Matching time of a <file>... usage pattern for growing argv lengths,
+the time per argument should stay flat when matching is linear
+
+Usage:
+    python benchmarks/long_argv.py [<max>]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fallbackdocopt import compile_spec
+
+DOC = """
+Usage:
+    prog [-v] [--level=<n>] <file>...
+
+Options:
+    -v           Verbose.
+    --level=<n>  Level [default: 1].
+"""
+
+
+def main():
+    """
+    main
+    """
+    maximum = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    spec = compile_spec(DOC)
+    n = 1000
+
+    while n <= maximum:
+        argv = ["-v"] + ["path/%d" % i for i in range(n)] + ["--level", "3"]
+        start = time.perf_counter()
+        result = spec.parse(argv)
+        elapsed = time.perf_counter() - start
+        assert len(result["<file>"]) == n
+        print("%7d arguments : %8.1f ms  %6.2f us/argument" % (n, elapsed * 1000, elapsed * 1e6 / n))
+        n *= 10
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# coding=utf-8
+"""
+Memory allocated while parsing argv against a doc with hundreds of options,
+measured with tracemalloc
+
+Usage:
+    python benchmarks/parse_allocations.py [<options>]
+"""
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fallbackdocopt import DocoptExit, Left, TokenStream, compile_spec, parse_argv
+
+
+def make_doc(options):
+    """
+    @type options: int
+    @return: str
+    """
+    lines = ["Service", "Usage:", "    prog [options] <name>...", "", "Options:"]
+
+    for i in range(options):
+        if i % 2:
+            lines.append("    --flag%d  Flag %d." % (i, i))
+        else:
+            lines.append("    -o%d --opt%d=<v>  Option %d [default: %d]." % (i % 10, i, i, i))
+
+    return "\n".join(lines) + "\n"
+
+
+def main():
+    """
+    main
+    """
+    options = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    spec = compile_spec(make_doc(options))
+    argv = []
+
+    for i in range(0, options, 3):
+        argv.append("--flag%d" % i if i % 2 else "--opt%d=x" % i)
+        argv.append("name%d" % i)
+
+    spec.parse(argv)
+    tracemalloc.start()
+
+    # argv leaves kept alive: bytes and blocks per token
+    before = tracemalloc.take_snapshot()
+    tokens = parse_argv(TokenStream(argv, DocoptExit), list(spec.options))
+    left = Left(tokens)
+    after = tracemalloc.take_snapshot()
+    stats = after.compare_to(before, "filename")
+    size = sum(s.size_diff for s in stats)
+    count = sum(s.count_diff for s in stats)
+    print("argv tokens          : %d" % len(argv))
+    print("retained per token   : %.0f bytes, %.2f blocks" % (size / len(argv), count / len(argv)))
+
+    # peak of a full parse, intermediate objects included
+    del tokens, left
+    tracemalloc.reset_peak()
+    base = tracemalloc.get_traced_memory()[0]
+    spec.parse(argv)
+    peak = tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+    print("peak per parse       : %d bytes" % peak)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# coding=utf-8
+"""
+Throughput of parse_file over a generated file of command lines, per number of workers
+
+Usage:
+    python benchmarks/parse_file.py [<lines>]
+"""
+import os
+import sys
+import time
+import shutil
+import tempfile
+import multiprocessing
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from arguments import parse_file
+
+DOC = """
+    Chatops bot
+    Usage:
+        bot deploy <app> [--env=<env>] [--force]
+        bot rollback <app> [<version>]
+        bot status [<app>...]
+
+    Options:
+        -e --env=<env>  Environment [default: staging].
+        -f --force      Deploy even when checks fail.
+"""
+
+LINES = ['deploy web --env=prod', 'rollback api 12', 'status web api "db main"', 'deploy worker -f', 'deploi web']
+
+
+def main():
+    """
+    main
+    """
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    directory = tempfile.mkdtemp()
+    infile = os.path.join(directory, "commands.txt")
+    outfile = os.path.join(directory, "results.jsonl")
+
+    with open(infile, "w") as f:
+        for i in range(count):
+            f.write(LINES[i % len(LINES)] + "\n")
+
+    print("lines   : %d" % count)
+    base = None
+    workers = 1
+
+    while workers <= multiprocessing.cpu_count():
+        start = time.perf_counter()
+        parse_file(DOC, infile, outfile, workers=workers)
+        elapsed = time.perf_counter() - start
+        base = base or elapsed
+        print("workers : %2d %8.0f lines/s  speedup %.1fx" % (workers, count / elapsed, base / elapsed))
+        workers *= 2
+
+    shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+# coding=utf-8
+"""
+Throughput of parse_many against constructing Arguments for every argv
+
+Usage:
+    python benchmarks/parse_many.py [<count>]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from arguments import Arguments, parse_many
+
+DOC = """
+    Chatops bot
+    Usage:
+        bot deploy <app> [--env=<env>] [--force]
+        bot rollback <app> [<version>]
+        bot status [<app>...]
+
+    Options:
+        -e --env=<env>  Environment [default: staging].
+        -f --force      Deploy even when checks fail.
+
+    Commands:
+        deploy      Deploy an app
+        rollback    Roll an app back
+        status      Show status
+"""
+
+
+def make_argvs(count):
+    """
+    @type count: int
+    @return: list
+    """
+    argvs = [["deploy", "web", "--env=prod"], ["rollback", "api", "12"], ["status", "web", "api", "db"], ["deploy", "worker", "-f"]]
+    return [argvs[i % len(argvs)] for i in range(count)]
+
+
+def main():
+    """
+    main
+    """
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    argvs = make_argvs(count)
+    start = time.perf_counter()
+
+    for argv in argvs:
+        Arguments(DOC, argvalue=list(argv))
+
+    loop = time.perf_counter() - start
+    start = time.perf_counter()
+    results = list(parse_many(DOC, argvs))
+    many = time.perf_counter() - start
+    assert all(r.ok for r in results)
+    print("argvs              : %d" % count)
+    print("Arguments in loop  : %8.0f parses/s" % (count / loop))
+    print("parse_many         : %8.0f parses/s" % (count / many))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# coding=utf-8
+"""
+Path normalization with home and working directory looked up per value against once per
+parse, and stat of a <path>... list one by one against on a thread pool
+
+Usage:
+    python benchmarks/paths.py [<count>]
+"""
+import os
+import sys
+import shutil
+import timeit
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from arguments import PathResolver, normalize_path, stat_path, stat_paths
+
+
+def main():
+    """
+    main
+    """
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    values = dict(("--path%d" % i, "./data/%d/../file%d" % (i, i) if i % 2 else "~/file%d" % i) for i in range(count))
+
+    def uncached():
+        """
+        uncached
+        """
+        for k in values:
+            normalize_path(k, values[k], PathResolver())
+
+    def cached():
+        """
+        cached
+        """
+        resolver = PathResolver()
+
+        for k in values:
+            normalize_path(k, values[k], resolver)
+
+    print("path values : %d" % count)
+
+    for name, run in (("per value", uncached), ("per parse", cached)):
+        print("%-12s: %.2f ms" % (name, 1000 * min(timeit.repeat(run, number=5, repeat=3)) / 5))
+
+    folder = tempfile.mkdtemp()
+
+    try:
+        paths = []
+
+        for i in range(count):
+            paths.append(os.path.join(folder, "file%d" % i if i % 4 else "missing%d" % i))
+
+            if i % 4:
+                open(paths[-1], "w").close()
+
+        assert [s is not None for s in stat_paths(paths)] == [stat_path(p) is not None for p in paths]
+
+        for name, run in (("stat serial", lambda: [stat_path(p) for p in paths]), ("stat pool", lambda: stat_paths(paths))):
+            print("%-12s: %.2f ms" % (name, 1000 * min(timeit.repeat(run, number=3, repeat=3)) / 3))
+    finally:
+        shutil.rmtree(folder)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+# coding=utf-8
+"""
+Validation of an argument dict with Schema.validate against the compiled Schema.compile()
+
+Usage:
+    python benchmarks/schema_compile.py [<keys>]
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from arguments import And, Or, Schema, Use
+
+
+def main():
+    """
+    main
+    """
+    keys = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+    schema = {"app": And(str, len), "env": Or(None, Use(str)), "force": bool, "count": Use(int)}
+    data = {"app": "web", "env": "prod", "force": False, "count": "3"}
+
+    for i in range(keys - len(schema)):
+        schema["task%d" % i] = Use(str)
+        data["task%d" % i] = False
+
+    schema = Schema(schema)
+    compiled = schema.compile()
+    assert compiled(data) == schema.validate(data)
+    number = 200
+    interpreted = min(timeit.repeat(lambda: schema.validate(data), number=number, repeat=3)) / number
+    fast = min(timeit.repeat(lambda: compiled(data), number=number, repeat=3)) / number
+    print("keys        : %d" % keys)
+    print("validate    : %8.1f us" % (interpreted * 1e6))
+    print("compiled    : %8.1f us  %.1fx" % (fast * 1e6, interpreted / fast))
+
+
+if __name__ == "__main__":
+    main()
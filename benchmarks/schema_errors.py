@@ -0,0 +1,60 @@
+# coding=utf-8
+"""
+Validation of failure-heavy records: failing Or alternatives on large values and
+records with many bad keys, first error against collect mode, with and without
+reading the message
+
+Usage:
+    python benchmarks/schema_errors.py [<keys>]
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from arguments import Or, Schema, SchemaError, Use
+
+
+def main():
+    """
+    main
+    """
+    keys = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    paths = ["/var/log/app%d.log" % i for i in range(200)]
+    schema = {"paths": Or(None, int, float, [str]), "mode": Or("fast", "slow", "auto")}
+    good = {"paths": paths, "mode": "auto"}
+    bad = {"paths": paths, "mode": "other"}
+
+    for i in range(keys):
+        schema["count%d" % i] = Use(int)
+        good["count%d" % i] = "1"
+        bad["count%d" % i] = "x" if i % 2 else "1"
+
+    schema = Schema(schema)
+    first = schema.compile()
+    collect = schema.compile(collect=True)
+
+    def run(validate, data, read):
+        """
+        @type validate: function
+        @type data: dict
+        @type read: bool
+        @return: None
+        """
+        try:
+            validate(data)
+        except SchemaError as ex:
+            if read:
+                return ex.code
+
+    number = 200
+
+    for name, validate, data, read in (("valid, Or fails over", first, good, False), ("first error", first, bad, False), ("first error, code", first, bad, True),
+                                       ("collect", collect, bad, False), ("collect, code", collect, bad, True)):
+        elapsed = min(timeit.repeat(lambda: run(validate, data, read), number=number, repeat=3)) / number
+        print("%-24s %8.1f us" % (name, elapsed * 1e6))
+
+
+if __name__ == "__main__":
+    main()
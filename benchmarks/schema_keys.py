@@ -0,0 +1,49 @@
+# coding=utf-8
+"""
+Dict schema validation time against the number of literal option keys,
+interpreted and compiled
+
+Usage:
+    python benchmarks/schema_keys.py
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from arguments import Optional, Schema, Use
+
+
+def make(keys):
+    """
+    @type keys: int
+    @return: tuple
+    """
+    schema = {"app": str, Optional("env"): str, Optional("count"): Use(int)}
+    data = {"app": "web", "env": "prod", "count": "3"}
+
+    for i in range(keys):
+        schema["option%d" % i] = bool
+        data["option%d" % i] = False
+
+    return Schema(schema), data
+
+
+def main():
+    """
+    main
+    """
+    print("%6s %14s %14s" % ("keys", "validate us", "compiled us"))
+
+    for keys in (10, 20, 40, 80, 160):
+        schema, data = make(keys)
+        compiled = schema.compile()
+        number = 50
+        interpreted = min(timeit.repeat(lambda: schema.validate(data), number=number, repeat=3)) / number
+        fast = min(timeit.repeat(lambda: compiled(data), number=number, repeat=3)) / number
+        print("%6d %14.1f %14.1f" % (keys, interpreted * 1e6, fast * 1e6))
+
+
+if __name__ == "__main__":
+    main()
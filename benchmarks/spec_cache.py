@@ -0,0 +1,54 @@
+# coding=utf-8
+"""
+Compile cost of a usage doc versus the in-process and on-disk spec caches
+
+Usage:
+    python benchmarks/spec_cache.py [<commands>]
+"""
+import os
+import sys
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fallbackdocopt import Spec, SpecCache, SpecStore
+
+
+def make_doc(commands):
+    """
+    @type commands: int
+    @return: str
+    """
+    lines = ["Big tool", "Usage:"]
+
+    for i in range(commands):
+        lines.append("    prog cmd%d [options] <arg%d> [<rest>...]" % (i, i))
+
+    lines.extend(["", "Options:", "    -h --help     Show this screen.", "    -v --verbose  Verbose mode.", "    --level=<n>   Level [default: 1]."])
+    return "\n".join(lines) + "\n"
+
+
+def main():
+    """
+    main
+    """
+    commands = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    doc = make_doc(commands)
+    store = SpecStore(tempfile.mkdtemp())
+    cache = SpecCache()
+    cache.get(doc)
+    store.save("spec", doc, Spec(doc))
+    number = 20
+    compile_time = timeit.timeit(lambda: Spec(doc), number=number) / number
+    disk_time = timeit.timeit(lambda: store.load("spec", doc), number=number) / number
+    hit_time = timeit.timeit(lambda: cache.get(doc), number=number * 100) / (number * 100)
+    print("usage lines      : %d" % commands)
+    print("compile          : %.3f ms" % (compile_time * 1000))
+    print("disk cache load  : %.3f ms" % (disk_time * 1000))
+    print("memory cache hit : %.3f ms" % (hit_time * 1000))
+    store.clear()
+
+
+if __name__ == "__main__":
+    main()
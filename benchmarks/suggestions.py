@@ -0,0 +1,59 @@
+# coding=utf-8
+"""
+Typo suggestions from a deletion index over 10k names versus comparing a typo
+against every name
+
+Usage:
+    python benchmarks/suggestions.py [<names>]
+"""
+import os
+import sys
+import random
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fallbackdocopt import TypoIndex, levenshtein
+
+
+def make_names(count):
+    """
+    @type count: int
+    @return: list
+    """
+    rnd = random.Random(7)
+    syllables = ["de", "ploy", "sync", "cache", "node", "re", "start", "stop", "log", "scale", "ro", "ll", "back", "up", "mi", "grate", "db", "net"]
+    names = set()
+
+    while len(names) < count:
+        names.add("".join(rnd.choice(syllables) for _ in range(rnd.randint(2, 4))))
+
+    return sorted(names)
+
+
+def main():
+    """
+    main
+    """
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    names = make_names(count)
+    build = timeit.timeit(lambda: TypoIndex(names), number=1)
+    tree = TypoIndex(names)
+    rnd = random.Random(3)
+    typos = []
+
+    for name in rnd.sample(names, 50):
+        i = rnd.randrange(len(name))
+        typos.append(name[:i] + name[i + 1:])
+
+    number = 3
+    bktree = timeit.timeit(lambda: [tree.search(t, 2) for t in typos], number=number) / (number * len(typos))
+    brute = timeit.timeit(lambda: [sorted((levenshtein(t, n), n) for n in names) for t in typos[:5]], number=1) / 5
+    print("names         : %d" % len(tree))
+    print("build         : %.1f ms" % (build * 1000))
+    print("index query   : %.3f ms" % (bktree * 1000))
+    print("brute force   : %.3f ms" % (brute * 1000))
+
+
+if __name__ == "__main__":
+    main()
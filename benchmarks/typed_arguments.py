@@ -0,0 +1,58 @@
+# coding=utf-8
+"""
+Cost of typed placeholders converted by the compiled spec against the number guessing
+sort_arguments does for untyped string values
+
+Usage:
+    python benchmarks/typed_arguments.py [<options>]
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from arguments import Arguments, argument_name, compile_spec, prepare_arguments
+
+
+def make_doc(count, typed):
+    """
+    @type count: int
+    @type typed: bool
+    @return: str
+    """
+    usage = " ".join("[--num%d=<n%d%s>] [--name%d=<s%d%s>]" % (i, i, ":int" if typed else "", i, i, ":str" if typed else "") for i in range(count))
+    return "Usage:\n    prog run %s\n" % usage
+
+
+def main():
+    """
+    main
+    """
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    argv = ["run"]
+
+    for i in range(count):
+        argv += ["--num%d=%d" % (i, i), "--name%d=web-%d.example" % (i, i)]
+
+    print("options     : %d" % (2 * count))
+
+    for name, typed in (("guessed", False), ("typed", True)):
+        spec = compile_spec(make_doc(count, typed))
+        names = set(argument_name(k) for k, t in spec.types)
+
+        def run():
+            """
+            run
+            """
+            return Arguments.sort_arguments(prepare_arguments(dict(spec.parse(list(argv))), None), names)
+
+        options, positional = run()
+        assert options["num1"] == 1 and options["name1"] == "web-1.example"
+        number = 2000
+        elapsed = min(timeit.repeat(run, number=number, repeat=3)) / number
+        print("%-12s: %8.1f us per parse" % (name, elapsed * 1e6))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# coding=utf-8
+"""
+Validation of many argument records, one compiled validate call per record against
+Schema.validate_many, with numpy when it is installed and without
+
+Usage:
+    python benchmarks/validate_many.py [<records>]
+"""
+import os
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import arguments
+from arguments import And, Optional, Range, Schema, SchemaError, Use
+
+SCHEMA = {"port": And(int, Range(1, 65535)), "retries": And(int, Range(0, 10)), "force": bool, "name": And(str, len), Optional("count", default=1): Use(int)}
+
+for i in range(20):
+    SCHEMA["flag%d" % i] = bool
+
+
+def make(count):
+    """
+    @type count: int
+    @return: list
+    """
+    random.seed(0)
+    records = []
+
+    for _ in range(count):
+        record = {"port": random.choice([80, 443, 8080, 0, 70000]), "retries": random.randint(0, 12), "force": False, "name": "web"}
+
+        for i in range(20):
+            record["flag%d" % i] = False
+
+        records.append(record)
+
+    return records
+
+
+def best(function, repeat=5):
+    """
+    @type function: function
+    @type repeat: int
+    @return: float
+    """
+    timings = []
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+
+    return min(timings)
+
+
+def main():
+    """
+    main
+    """
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    records = make(count)
+    validate = Schema(SCHEMA).compile()
+
+    def per_record():
+        """
+        per_record
+        """
+        mask = []
+
+        for record in records:
+            try:
+                validate(record)
+                mask.append(False)
+            except SchemaError:
+                mask.append(True)
+
+        return mask
+
+    mask = per_record()
+    print("records             : %d" % count)
+    print("per record          : %8.1f ms" % (best(per_record) * 1000))
+
+    for name, numpy in (("validate_many", arguments.import_numpy), ("without numpy", lambda: None)):
+        if name == "validate_many" and numpy() is None:
+            continue
+
+        arguments.import_numpy = numpy
+        schema = Schema(SCHEMA)
+        assert schema.validate_many(records)[1] == mask
+        print("%-20s: %8.1f ms" % (name, best(lambda: schema.validate_many(records)) * 1000))
+
+
+if __name__ == "__main__":
+    main()
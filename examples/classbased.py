@@ -12,12 +12,12 @@ class BaseArguments(arguments.Arguments):
     """
     Default initializations for this program (no schema validateion)
     """
-    def __init__(self, doc):
+    def __init__(self, doc, argvalue=None):
         """
         @type doc: str, unicode
+        @type argvalue: list, None
         @return: None
         """
-        argvalue = None
         yamlstr = None
         yamlfile = None
         parse_arguments = True
@@ -32,7 +32,7 @@ class MainArguments(BaseArguments):
     """
     First level of the commandline hierarchy
     """
-    def __init__(self):
+    def __init__(self, argvalue=None):
         doc = """
             Some tools.
             Usage:
@@ -47,14 +47,15 @@ class MainArguments(BaseArguments):
                 tool2   Tool2 ...
         """
         self.tool = ""
-        super().__init__(doc)
+        super().__init__(doc, argvalue)
 
 
+@MainArguments.subcommand("tool1")
 class Tool1Arguments(BaseArguments):
     """
     Tool1, second level of the commandline hierarchy
     """
-    def __init__(self):
+    def __init__(self, argvalue=None):
         doc = """
             Tool 1
             Usage:
@@ -70,14 +71,15 @@ class Tool1Arguments(BaseArguments):
         """
         self.command = ""
 
-        super().__init__(doc)
+        super().__init__(doc, argvalue)
 
 
+@MainArguments.subcommand("tool2")
 class Tool2Arguments(BaseArguments):
     """
     Tool2, second level of the commandline hierarchy
     """
-    def __init__(self):
+    def __init__(self, argvalue=None):
         doc = """
             Tool 2
             Usage:
@@ -92,20 +94,16 @@ class Tool2Arguments(BaseArguments):
                 delete  Delete something
         """
         self.command = ""
-        super().__init__(doc)
+        super().__init__(doc, argvalue)
 
 
 def main():
     """
     main
     """
-    args = MainArguments()
+    args = MainArguments.route()
 
-    if args.tool.lower() == "tool1":
-        args = Tool1Arguments()
-    elif args.tool.lower() == "tool2":
-        args = Tool2Arguments()
-    else:
+    if not args.m_parents:
         print("Unknown tool", args.tool)
 
     print(args)
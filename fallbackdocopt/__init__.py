@@ -6,13 +6,28 @@
  * Copyright (c) 2013 Vladimir Keleshev, vladimir@keleshev.com
 
 """
+import os
 import sys
 import re
+import hashlib
+import threading
+from collections import OrderedDict, deque
 
 
-__all__ = ['docopt']
+__all__ = ['docopt', 'compile_spec', 'Spec', 'SpecCache', 'SpecStore',
+           'Automaton', 'ENGINES', 'TypoIndex',
+           'spec_cache', 'enable_disk_cache', 'disable_disk_cache']
 __version__ = '0.6.2'
 
+# most cases Pattern.either may expand to before giving up
+EITHER_LIMIT = 10000
+
+# bump when the layout of a compiled Spec changes, invalidates disk caches
+SPEC_FORMAT = 9
+
+# converters for typed placeholders such as <port:int> or --ratio=<f:float>
+TYPES = {'int': int, 'float': float, 'str': str}
+
 
 class DocoptLanguageError(Exception):
 
@@ -24,18 +39,49 @@ class DocoptExit(SystemExit):
     """Exit in case user invoked program with incorrect arguments."""
 
     usage = ''
+    suggestions = ()
 
     def __init__(self, message=''):
         SystemExit.__init__(self, (message + '\n' + self.usage).strip())
 
 
+def value_key(value):
+    """Hashable form of a leaf value that tells apart e.g. 0 and False."""
+    if type(value) is list:
+        return list, tuple(value)
+    return type(value), value
+
+
 class Pattern(object):
 
+    """Base of the pattern tree.
+
+    Equality and hashing are structural: leaves compare their type and
+    fields and cache their hash until their value changes, parents
+    compare their type and children. Neither formats the tree as text.
+
+    Only leaves cache their hash and only leaves are interned, by
+    `fix_identities` once the tree is built. Parents hash their children
+    on every call: their children lists are still replaced and their
+    leaves' values changed while the tree is fixed up, so a cached parent
+    hash would go stale.
+
+    """
+
+    __slots__ = ()
+
     def __eq__(self, other):
-        return repr(self) == repr(other)
+        if self is other:
+            return True
+        if type(self) is not type(other):
+            return False
+        return self.key() == other.key()
+
+    def __ne__(self, other):
+        return not self == other
 
     def __hash__(self):
-        return hash(repr(self))
+        return hash((type(self), self.key()))
 
     def fix(self):
         self.fix_identities()
@@ -43,40 +89,81 @@ class Pattern(object):
         return self
 
     def fix_identities(self, uniq=None):
-        """Make pattern-tree tips point to same object if they are equal."""
+        """Make pattern-tree tips point to same object if they are equal.
+
+        `uniq` interns the tips: it maps each tip to the first equal tip
+        seen, so the first occurrence in the tree is the one kept.
+
+        """
         if not hasattr(self, 'children'):
             return self
-        uniq = list(set(self.flat())) if uniq is None else uniq
+        if uniq is None:
+            uniq = {}
+        elif not isinstance(uniq, dict):
+            table = {}
+            for c in uniq:
+                table.setdefault(c, c)
+            uniq = table
         for i, c in enumerate(self.children):
             if not hasattr(c, 'children'):
-                assert c in uniq
-                self.children[i] = uniq[uniq.index(c)]
+                self.children[i] = uniq.setdefault(c, c)
             else:
                 c.fix_identities(uniq)
 
     def fix_repeating_arguments(self):
         """Fix elements that should accumulate/increment values."""
-        either = [list(c.children) for c in self.either.children]
-        for case in either:
-            for e in [c for c in case if case.count(c) > 1]:
-                if type(e) is Argument or type(e) is Option and e.argcount:
-                    if e.value is None:
-                        e.value = []
-                    elif type(e.value) is not list:
-                        e.value = e.value.split()
-                if type(e) is Command or type(e) is Option and e.argcount == 0:
-                    e.value = 0
+        repeating = set(c for c, n in self.occurrences().items() if n > 1)
+        # collect before changing values, that changes the hash of a leaf
+        for e in [c for c in self.flat() if c in repeating]:
+            if type(e) is Argument or type(e) is Option and e.argcount:
+                if e.value is None:
+                    e.value = []
+                elif type(e.value) is not list:
+                    e.value = e.value.split()
+            if type(e) is Command or type(e) is Option and e.argcount == 0:
+                e.value = 0
         return self
 
+    def occurrences(self, memo=None):
+        """Most times each leaf occurs in one case of `either`, capped at 2.
+
+        Computed bottom-up without expanding the cases: a sequence adds
+        the counts of its children, `OneOrMore` doubles them and `Either`
+        takes the maximum over its alternatives.
+
+        """
+        memo = {} if memo is None else memo
+        if id(self) in memo:
+            return memo[id(self)]
+        if not hasattr(self, 'children'):
+            counts = {self: 1}
+        elif type(self) is Either:
+            counts = {}
+            for child in self.children:
+                for leaf, n in child.occurrences(memo).items():
+                    if n > counts.get(leaf, 0):
+                        counts[leaf] = n
+        else:
+            factor = 2 if type(self) is OneOrMore else 1
+            counts = {}
+            for child in self.children:
+                for leaf, n in child.occurrences(memo).items():
+                    counts[leaf] = min(2, counts.get(leaf, 0) + n * factor)
+        memo[id(self)] = counts
+        return counts
+
     @property
     def either(self):
         """Transform pattern into an equivalent, with only top-level Either."""
         # Currently the pattern will not be equivalent, but more "narrow",
         # although good enough to reason about list arguments.
         ret = []
-        groups = [[self]]
+        groups = deque([[self]])
         while groups:
-            children = groups.pop(0)
+            if len(ret) + len(groups) > EITHER_LIMIT:
+                raise DocoptLanguageError('usage expands to more than %d '
+                                          'cases' % EITHER_LIMIT)
+            children = groups.popleft()
             types = [type(c) for c in children]
             if Either in types:
                 either = [c for c in children if type(c) is Either][0]
@@ -106,9 +193,50 @@ class Pattern(object):
 
 class ChildPattern(Pattern):
 
+    """Leaf of the pattern tree.
+
+    Leaves are created for every argv token, so they use `__slots__`
+    instead of an instance dict.
+
+    """
+
+    __slots__ = ('_value', '_hash')
+
     def __init__(self, name, value=None):
         self.name = name
-        self.value = value
+        self._value = value
+        self._hash = None
+
+    @property
+    def value(self):
+        return self._value
+
+    @value.setter
+    def value(self, value):
+        self._value = value
+        self._hash = None
+
+    def key(self):
+        return self.name, value_key(self._value)
+
+    def __hash__(self):
+        if self._hash is None:
+            self._hash = hash((type(self), self.key()))
+        return self._hash
+
+    def __getstate__(self):
+        # str hashes differ between processes, never persist the cache
+        state = {}
+        for cls in type(self).__mro__:
+            for name in getattr(cls, '__slots__', ()):
+                if name != '_hash':
+                    state[name] = getattr(self, name)
+        return state
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+        self._hash = None
 
     def __repr__(self):
         return '%s(%r, %r)' % (self.__class__.__name__, self.name, self.value)
@@ -118,17 +246,17 @@ class ChildPattern(Pattern):
 
     def match(self, left, collected=None):
         collected = [] if collected is None else collected
-        pos, match = self.single_match(left)
+        left = as_left(left)
+        left_, match = self.single_match(left)
         if match is None:
             return False, left, collected
-        left_ = left[:pos] + left[pos + 1:]
         same_name = [a for a in collected if a.name == self.name]
-        if type(self.value) in (int, list):
-            if type(self.value) is int:
+        if type(self._value) in (int, list):
+            if type(self._value) is int:
                 increment = 1
             else:
-                increment = ([match.value] if type(match.value) is str
-                             else match.value)
+                increment = ([match._value] if type(match._value) is str
+                             else match._value)
             if not same_name:
                 match.value = increment
                 return True, left_, collected + [match]
@@ -142,6 +270,9 @@ class ParentPattern(Pattern):
     def __init__(self, *children):
         self.children = list(children)
 
+    def key(self):
+        return tuple(self.children)
+
     def __repr__(self):
         return '%s(%s)' % (self.__class__.__name__,
                            ', '.join(repr(a) for a in self.children))
@@ -154,10 +285,12 @@ class ParentPattern(Pattern):
 
 class Argument(ChildPattern):
 
+    __slots__ = ('name',)
+
     def single_match(self, left):
-        for n, p in enumerate(left):
-            if type(p) is Argument:
-                return n, Argument(self.name, p.value)
+        p = left.positional()
+        if p is not None:
+            return left.consume_positional(), Argument(self.name, p._value)
         return None, None
 
     @classmethod
@@ -169,27 +302,30 @@ class Argument(ChildPattern):
 
 class Command(Argument):
 
+    __slots__ = ()
+
     def __init__(self, name, value=False):
         self.name = name
-        self.value = value
+        self._value = value
+        self._hash = None
 
     def single_match(self, left):
-        for n, p in enumerate(left):
-            if type(p) is Argument:
-                if p.value == self.name:
-                    return n, Command(self.name, True)
-                else:
-                    break
+        p = left.positional()
+        if p is not None and p._value == self.name:
+            return left.consume_positional(), Command(self.name, True)
         return None, None
 
 
 class Option(ChildPattern):
 
+    __slots__ = ('short', 'long', 'argcount')
+
     def __init__(self, short=None, long=None, argcount=0, value=False):
         assert argcount in (0, 1)
         self.short, self.long = short, long
-        self.argcount, self.value = argcount, value
-        self.value = None if value is False and argcount else value
+        self.argcount = argcount
+        self._value = None if value is False and argcount else value
+        self._hash = None
 
     @classmethod
     def parse(class_, option_description):
@@ -209,15 +345,18 @@ class Option(ChildPattern):
         return class_(short, long, argcount, value)
 
     def single_match(self, left):
-        for n, p in enumerate(left):
-            if self.name == p.name:
-                return n, p
+        p = left.option(self.name)
+        if p is not None:
+            return left.consume_option(self.name), p
         return None, None
 
     @property
     def name(self):
         return self.long or self.short
 
+    def key(self):
+        return self.short, self.long, self.argcount, value_key(self._value)
+
     def __repr__(self):
         return 'Option(%r, %r, %r, %r)' % (self.short, self.long,
                                            self.argcount, self.value)
@@ -227,6 +366,7 @@ class Required(ParentPattern):
 
     def match(self, left, collected=None):
         collected = [] if collected is None else collected
+        left = as_left(left)
         l = left
         c = collected
         for p in self.children:
@@ -240,6 +380,7 @@ class Optional(ParentPattern):
 
     def match(self, left, collected=None):
         collected = [] if collected is None else collected
+        left = as_left(left)
         for p in self.children:
             m, left, collected = p.match(left, collected)
         return True, left, collected
@@ -255,6 +396,7 @@ class OneOrMore(ParentPattern):
     def match(self, left, collected=None):
         assert len(self.children) == 1
         collected = [] if collected is None else collected
+        left = as_left(left)
         l = left
         c = collected
         l_ = None
@@ -276,6 +418,7 @@ class Either(ParentPattern):
 
     def match(self, left, collected=None):
         collected = [] if collected is None else collected
+        left = as_left(left)
         outcomes = []
         for p in self.children:
             matched, _, _ = outcome = p.match(left, collected)
@@ -286,27 +429,379 @@ class Either(ParentPattern):
         return False, left, collected
 
 
-class TokenStream(list):
+class Left(object):
+
+    """Remaining argv of a match, consumed by moving cursors.
+
+    Arguments and commands always take the first remaining positional
+    token and an option the first remaining token with its name, so the
+    state is one cursor into the positionals plus one cursor per option
+    name. Consuming a token returns a new `Left` sharing the token lists
+    with this one, which keeps backtracking cheap and matching linear.
+
+    """
+
+    __slots__ = ('argv', 'positionals', 'options', 'pos', 'cursors', 'size')
+
+    def __init__(self, argv):
+        self.argv = tuple(argv)
+        self.positionals = []
+        self.options = {}
+        for n, p in enumerate(self.argv):
+            if type(p) is Argument:
+                self.positionals.append(n)
+            else:
+                self.options.setdefault(p.name, []).append(n)
+        self.pos = 0
+        self.cursors = {}
+        self.size = len(self.argv)
+
+    def _copy(self, pos, cursors):
+        left = object.__new__(Left)
+        left.argv = self.argv
+        left.positionals = self.positionals
+        left.options = self.options
+        left.pos = pos
+        left.cursors = cursors
+        left.size = self.size - 1
+        return left
+
+    def positional(self, offset=0):
+        if self.pos + offset < len(self.positionals):
+            return self.argv[self.positionals[self.pos + offset]]
+        return None
+
+    def consume_positional(self):
+        return self._copy(self.pos + 1, self.cursors)
+
+    def option(self, name):
+        indices = self.options.get(name)
+        if indices:
+            cursor = self.cursors.get(name, 0)
+            if cursor < len(indices):
+                return self.argv[indices[cursor]]
+        return None
+
+    def consume_option(self, name):
+        cursors = dict(self.cursors)
+        cursors[name] = cursors.get(name, 0) + 1
+        return self._copy(self.pos, cursors)
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        remaining = self.positionals[self.pos:]
+        for name, indices in self.options.items():
+            remaining.extend(indices[self.cursors.get(name, 0):])
+        return iter([self.argv[n] for n in sorted(remaining)])
+
+    def __eq__(self, other):
+        if type(other) is not Left:
+            return list(self) == other
+        return (self.argv is other.argv and self.pos == other.pos and
+                self.cursors == other.cursors)
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return 'Left(%r)' % list(self)
+
+
+def as_left(left):
+    return left if type(left) is Left else Left(left)
+
+
+class CommandIndex(object):
+
+    """Alternatives of a usage `Either` indexed by their leading commands.
+
+    An alternative that starts with commands can only match when the
+    first positional tokens spell those commands, so only alternatives on
+    the path of the argv through the index are matched, together with the
+    alternatives that do not start with a command. The outcome is the
+    same as matching the full `Either`.
+
+    """
+
+    def __init__(self, either):
+        self.children = list(either.children)
+        self.root = ({}, [])  # (sub-commands, alternatives ending here)
+        self.rest = []
+        for n, child in enumerate(self.children):
+            names = leading_commands(child)
+            if not names:
+                self.rest.append(n)
+                continue
+            node = self.root
+            for name in names:
+                node = node[0].setdefault(name, ({}, []))
+            node[1].append(n)
+
+    def candidates(self, left):
+        found = list(self.rest)
+        node = self.root
+        offset = 0
+        while node[0]:
+            p = left.positional(offset)
+            node = node[0].get(p.value) if p is not None else None
+            if node is None:
+                break
+            found.extend(node[1])
+            offset += 1
+        return [self.children[n] for n in sorted(found)]
+
+    def match(self, left, collected=None):
+        left = as_left(left)
+        return Either(*self.candidates(left)).match(left, collected)
+
+
+def leading_commands(pattern):
+    if type(pattern) is Command:
+        return [pattern.name]
+    names = []
+    if type(pattern) is Required:
+        for child in pattern.children:
+            if type(child) is not Command:
+                break
+            names.append(child.name)
+    return names
+
+
+class Automaton(object):
+
+    """Pattern tree compiled into a flat program for an iterative machine.
+
+    Every node becomes a few instructions working on one state (remaining
+    argv, collected leaves, success flag) and a stack of saved states, so
+    matching runs in a single loop without recursion or per-node dispatch.
+    The program keeps the semantics of `Pattern.match`: failed nodes
+    restore their input state, `OneOrMore` stops when nothing is consumed
+    and `Either` keeps the alternative that leaves the fewest tokens.
+    Alternatives that start with commands are guarded and skipped without
+    running when the positionals do not spell those commands.
+
+    """
+
+    (LEAF, SAVE, JUMP_IF_FAILED, COMMIT, RESTORE, JUMP, SUCCEED, LOOP,
+     REPEAT, EITHER, NEXT, CHOOSE, GUARD) = range(13)
+
+    def __init__(self, pattern):
+        self._program = []
+        self._compile(pattern)
+        self.program = tuple(tuple(op) for op in self._program)
+        del self._program
+
+    def _emit(self, *op):
+        self._program.append(list(op))
+        return len(self._program) - 1
+
+    def _compile(self, node):
+        t = type(node)
+        if not hasattr(node, 'children'):
+            self._emit(self.LEAF, node)
+        elif t is Required:
+            self._emit(self.SAVE)
+            jumps = []
+            for child in node.children:
+                self._compile(child)
+                jumps.append(self._emit(self.JUMP_IF_FAILED, None))
+            self._emit(self.COMMIT)
+            end = self._emit(self.JUMP, None)
+            fail = self._emit(self.RESTORE)
+            for n in jumps:
+                self._program[n][1] = fail
+            self._program[end][1] = len(self._program)
+        elif t is Optional or t is AnyOptions:
+            for child in node.children:
+                self._compile(child)
+            self._emit(self.SUCCEED)
+        elif t is OneOrMore:
+            assert len(node.children) == 1
+            self._emit(self.LOOP)
+            body = len(self._program)
+            self._compile(node.children[0])
+            self._emit(self.REPEAT, body)
+        elif t is Either:
+            self._emit(self.EITHER)
+            for child in node.children:
+                names = leading_commands(child)
+                guard = self._emit(self.GUARD, names, None) if names else None
+                self._compile(child)
+                after = self._emit(self.NEXT)
+                if guard is not None:
+                    self._program[guard][2] = after
+            self._emit(self.CHOOSE)
+        else:
+            raise TypeError('cannot compile %r' % node)
+
+    def match(self, left, collected=None):
+        left = as_left(left)
+        collected = [] if collected is None else collected
+        program = self.program
+        end = len(program)
+        stack = []
+        flag = True
+        pc = 0
+        while pc < end:
+            op = program[pc]
+            code = op[0]
+            pc += 1
+            if code == 0:  # LEAF
+                flag, left, collected = op[1].match(left, collected)
+            elif code == 2:  # JUMP_IF_FAILED
+                if not flag:
+                    pc = op[1]
+            elif code == 1:  # SAVE
+                stack.append((left, collected))
+            elif code == 3:  # COMMIT
+                stack.pop()
+                flag = True
+            elif code == 4:  # RESTORE
+                left, collected = stack.pop()
+                flag = False
+            elif code == 5:  # JUMP
+                pc = op[1]
+            elif code == 6:  # SUCCEED
+                flag = True
+            elif code == 7:  # LOOP
+                stack.append([left, collected, 0, None])
+            elif code == 8:  # REPEAT
+                frame = stack[-1]
+                if flag:
+                    frame[2] += 1
+                if flag and (frame[3] is None or frame[3] != left):
+                    frame[3] = left
+                    pc = op[1]
+                else:
+                    stack.pop()
+                    flag = frame[2] >= 1
+                    if not flag:
+                        left, collected = frame[0], frame[1]
+            elif code == 9:  # EITHER
+                stack.append((left, collected, []))
+            elif code == 10:  # NEXT
+                frame = stack[-1]
+                if flag:
+                    frame[2].append((left, collected))
+                left, collected = frame[0], frame[1]
+            elif code == 11:  # CHOOSE
+                outcomes = stack.pop()[2]
+                flag = bool(outcomes)
+                if flag:
+                    left, collected = min(outcomes, key=lambda o: len(o[0]))
+            elif code == 12:  # GUARD
+                for offset, name in enumerate(op[1]):
+                    p = left.positional(offset)
+                    if p is None or p.value != name:
+                        flag = False
+                        pc = op[2]
+                        break
+        return flag, left, collected
+
+
+class TokenStream(deque):
 
     def __init__(self, source, error):
         self += source.split() if hasattr(source, 'split') else source
         self.error = error
 
     def move(self):
-        return self.pop(0) if len(self) else None
+        return self.popleft() if len(self) else None
 
     def current(self):
         return self[0] if len(self) else None
 
 
+class OptionIndex(object):
+
+    """Options looked up by exact short or long name and by long prefix.
+
+    Wraps a list of options (appending to it keeps the index current) with
+    a dict per name kind and a trie over the long names whose nodes list
+    every option below them, so lookups do not depend on how many options
+    the doc declares. Results keep the order of the list. `overlay()`
+    returns an index that sees these options plus its own, which lets a
+    parse append unknown options without copying the compiled ones.
+
+    """
+
+    def __init__(self, options=None, parent=None):
+        self.options = [] if options is None else options
+        self.parent = parent
+        self.shorts = {}
+        self.longs = {}
+        self.trie = [{}, []]  # [children by character, options below]
+        for o in self.options:
+            self._index(o)
+
+    def _index(self, o):
+        if o.short:
+            self.shorts.setdefault(o.short, []).append(o)
+        if o.long:
+            self.longs.setdefault(o.long, []).append(o)
+            node = self.trie
+            for char in o.long:
+                node = node[0].setdefault(char, [{}, []])
+                node[1].append(o)
+
+    def append(self, o):
+        self.options.append(o)
+        self._index(o)
+
+    def overlay(self):
+        return OptionIndex(parent=self)
+
+    def short(self, name):
+        found = self.shorts.get(name, [])
+        if self.parent is not None:
+            found = self.parent.short(name) + found
+        return found
+
+    def long(self, name):
+        found = self.longs.get(name, [])
+        if self.parent is not None:
+            found = self.parent.long(name) + found
+        return found
+
+    def prefixed(self, prefix):
+        node = self.trie
+        for char in prefix:
+            node = node[0].get(char)
+            if node is None:
+                break
+        found = node[1] if node is not None else []
+        if self.parent is not None:
+            found = self.parent.prefixed(prefix) + found
+        return found
+
+    def __iter__(self):
+        if self.parent is not None:
+            for o in self.parent:
+                yield o
+        for o in self.options:
+            yield o
+
+    def __len__(self):
+        return len(self.options) + (len(self.parent) if self.parent else 0)
+
+
+def as_option_index(options):
+    return options if isinstance(options, OptionIndex) else OptionIndex(options)
+
+
 def parse_long(tokens, options):
     """long ::= '--' chars [ ( ' ' | '=' ) chars ] ;"""
+    options = as_option_index(options)
     long, eq, value = tokens.move().partition('=')
     assert long.startswith('--')
     value = None if eq == value == '' else value
-    similar = [o for o in options if o.long == long]
+    similar = options.long(long)
     if tokens.error is DocoptExit and similar == []:  # if no exact match
-        similar = [o for o in options if o.long and o.long.startswith(long)]
+        similar = options.prefixed(long)
     if len(similar) > 1:  # might be simply specified ambiguously 2+ times?
         raise tokens.error('%s is not a unique prefix: %s?' %
                            (long, ', '.join(o.long for o in similar)))
@@ -334,13 +829,14 @@ def parse_long(tokens, options):
 
 def parse_shorts(tokens, options):
     """shorts ::= '-' ( chars )* [ [ ' ' ] chars ] ;"""
+    options = as_option_index(options)
     token = tokens.move()
     assert token.startswith('-') and not token.startswith('--')
     left = token.lstrip('-')
     parsed = []
     while left != '':
         short, left = '-' + left[0], left[1:]
-        similar = [o for o in options if o.short == short]
+        similar = options.short(short)
         if len(similar) > 1:
             raise tokens.error('%s is specified ambiguously %d times' %
                                (short, len(similar)))
@@ -370,6 +866,7 @@ def parse_shorts(tokens, options):
 def parse_pattern(source, options):
     tokens = TokenStream(re.sub(r'([\[\]\(\)\|]|\.\.\.)', r' \1 ', source),
                          DocoptLanguageError)
+    options = as_option_index(options)
     result = parse_expr(tokens, options)
     if tokens.current() is not None:
         raise tokens.error('unexpected ending: %r' % ' '.join(tokens))
@@ -436,6 +933,7 @@ def parse_argv(tokens, options, options_first=False):
         argv ::= [ long | shorts | argument ]* [ '--' [ argument ]* ] ;
 
     """
+    options = as_option_index(options)
     parsed = []
     while tokens.current() is not None:
         if tokens.current() == '--':
@@ -472,6 +970,27 @@ def printable_usage(doc):
     return re.split(r'\n\s*\n', ''.join(usage_split[1:]))[0].strip()
 
 
+def parse_types(doc):
+    """`doc` without type annotations, and the annotations found.
+
+    Annotations are (option, <argument>, type name) triples, the option is
+    the one written right before the placeholder as in `--ratio=<f:float>`
+    or None. Only names in TYPES count as types, so text such as
+    `<host:port>` in a description is left alone.
+
+    """
+    annotations = []
+
+    def strip(match):
+        option, argument, name = match.groups()
+        if name not in TYPES:
+            return match.group(0)
+        annotations.append((option, '<%s>' % argument, name))
+        return match.group(0)[:-len(name) - 2] + '>'
+
+    return re.sub(r'(?:(-[\w-]+)[ =])?<([^<>:\s]+):(\w+)>', strip, doc), annotations
+
+
 def formal_usage(printable_usage):
     pu = printable_usage.split()[1:]  # split and drop "usage:"
     return '( ' + ' '.join(') | (' if s == pu[0] else s for s in pu[1:]) + ' )'
@@ -491,7 +1010,463 @@ class Dict(dict):
         return '{%s}' % ',\n '.join('%r: %r' % i for i in sorted(self.items()))
 
 
-def docopt(doc, argv=None, help=True, version=None, options_first=False):
+def levenshtein(a, b):
+    """Edit distance between two strings."""
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a):
+        current = [i + 1]
+        for j, cb in enumerate(b):
+            current.append(min(previous[j + 1] + 1, current[j] + 1,
+                               previous[j] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+
+def command_slots(pattern, limit=64):
+    """Positional slots of the usage lines of `pattern`, as far as fixed.
+
+    Returns a list of `(slots, open)`, one per way through the pattern.
+    A slot is a frozenset of command names, or None where an argument
+    takes the token. Optional and repeated parts with positionals in them
+    make the position of what follows unknown, `open` is then True.
+
+    """
+    if type(pattern) in (Command, Argument):
+        slots = frozenset([pattern.name]) if type(pattern) is Command else None
+        return [((slots,), False)]
+    if not isinstance(pattern, ParentPattern) or \
+            not pattern.flat(Command, Argument):
+        return [((), False)]
+    if type(pattern) is Either:
+        ways = []
+        for child in pattern.children:
+            ways.extend(command_slots(child, limit))
+    elif type(pattern) is Required:
+        ways = [((), False)]
+        for child in pattern.children:
+            child_ways = command_slots(child, limit)
+            extended = []
+            for slots, is_open in ways:
+                if is_open:
+                    extended.append((slots, is_open))
+                else:
+                    extended.extend((slots + more, more_open)
+                                    for more, more_open in child_ways)
+            ways = list(OrderedDict.fromkeys(extended))
+            if len(ways) > limit:
+                return [((), True)]
+    else:
+        return [((), True)]
+    return ways if len(ways) <= limit else [((), True)]
+
+
+def commands_at(slots, positional, position):
+    """Commands expected at `position` of `positional`, or None.
+
+    None when no usage line has a command there, or when one could take
+    the token as an argument or does not fix that position.
+
+    """
+    allowed = set()
+    for line, is_open in slots:
+        if any(line[i] is None or positional[i] not in line[i]
+               for i in range(min(position, len(line)))):
+            continue
+        if position < len(line):
+            if line[position] is None:
+                return None
+            allowed.update(line[position])
+        elif is_open:
+            return None
+    return allowed or None
+
+
+class TypoIndex(object):
+
+    """Names indexed for nearest matches by edit distance.
+
+    Every name is stored under each string obtained by deleting up to
+    `max_distance` of its characters. Two words within that edit distance
+    share such a string, so a query only looks up the deletions of the
+    word and checks the few names found, instead of measuring its distance
+    to every name.
+
+    """
+
+    def __init__(self, names=(), max_distance=2):
+        self.max_distance = max_distance
+        self.names = set()
+        self.deletes = {}
+        for name in names:
+            self.add(name)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self.names
+
+    @staticmethod
+    def variants(word, depth):
+        found = set([word])
+        edge = found
+        for _ in range(depth):
+            edge = set(w[:i] + w[i + 1:] for w in edge for i in range(len(w)))
+            found |= edge
+        return found
+
+    def add(self, name):
+        if name in self.names:
+            return
+        self.names.add(name)
+        for variant in self.variants(name, self.max_distance):
+            self.deletes.setdefault(variant, []).append(name)
+
+    def search(self, word, max_distance):
+        """(distance, name) pairs within `max_distance`, closest first."""
+        max_distance = min(max_distance, self.max_distance)
+        candidates = set()
+        for variant in self.variants(word, max_distance):
+            candidates.update(self.deletes.get(variant, ()))
+        found = []
+        for name in candidates:
+            if abs(len(name) - len(word)) <= max_distance:
+                d = levenshtein(word, name)
+                if d <= max_distance:
+                    found.append((d, name))
+        found.sort()
+        return found
+
+
+def fingerprint(doc):
+    """Stable key for a usage-message, used to look up compiled specs."""
+    if not isinstance(doc, bytes):
+        doc = doc.encode('utf-8')
+    return hashlib.sha1(doc).hexdigest()
+
+
+ENGINES = ('recursive', 'automaton')
+
+
+class Spec(object):
+
+    """Compiled form of a usage-message.
+
+    Holds everything `docopt` derives from `doc` alone (usage, option
+    defaults and the fixed pattern tree), so that parsing a new argv only
+    needs tokenizing and matching. A spec is shared between calls and is
+    never modified after construction.
+
+    """
+
+    def __init__(self, doc):
+        plain, annotations = parse_types(doc)
+        usage = printable_usage(doc)
+        options = parse_defaults(plain)
+        pattern = parse_pattern(formal_usage(printable_usage(plain)), options)
+        pattern_options = set(pattern.flat(Option))
+        for ao in pattern.flat(AnyOptions):
+            doc_options = parse_defaults(plain)
+            ao.children = list(set(doc_options) - pattern_options)
+        pattern.fix()
+        index = None
+        if len(pattern.children) == 1 and type(pattern.children[0]) is Either:
+            index = CommandIndex(pattern.children[0])
+        option_index = OptionIndex(list(options))
+        types = OrderedDict()
+        for option, argument, name in annotations:
+            found = []
+            if option is not None:
+                found = option_index.long(option) if option.startswith('--') \
+                    else option_index.short(option)
+            if found and found[0].argcount:
+                types[found[0].name] = name
+            else:
+                types[argument] = name
+        self._set('doc', doc)
+        self._set('fingerprint', fingerprint(doc))
+        self._set('usage', usage)
+        self._set('options', tuple(options))
+        self._set('option_index', option_index)
+        self._set('pattern', pattern)
+        self._set('index', index)
+        self._set('automaton', Automaton(pattern))
+        self._set('commands', frozenset(c.name for c in pattern.flat(Command)))
+        self._set('_names', None)
+        self._set('defaults', tuple((a.name, a.value) for a in pattern.flat()))
+        self._set('types', tuple(types.items()))
+        self._set('converters', tuple((key, name, TYPES[name])
+                                      for key, name in types.items()))
+
+    def _set(self, name, value):
+        object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('Spec is immutable')
+
+    def __repr__(self):
+        return 'Spec(%r)' % self.fingerprint
+
+    def parse(self, argv, help=True, version=None, options_first=False,
+              engine='recursive'):
+        """Match `argv` against this spec, see `docopt` for details."""
+        if engine not in ENGINES:
+            raise ValueError('unknown engine %r, use one of %s' %
+                             (engine, ', '.join(ENGINES)))
+        DocoptExit.usage = self.usage
+        tokens = parse_argv(TokenStream(argv, DocoptExit),
+                            self.option_index.overlay(), options_first)
+        extras(help, version, tokens, self.doc)
+        if engine == 'automaton':
+            matcher = self.automaton
+        elif self.index is not None:
+            matcher = self.index
+        else:
+            matcher = self.pattern
+        matched, left, collected = matcher.match(Left(tokens))
+        if matched:
+            # list defaults are copied, they belong to the shared pattern
+            result = Dict((name, list(value) if type(value) is list else value)
+                          for name, value in self.defaults)
+            result.update((a.name, a.value) for a in collected)
+            for key, name, convert in self.converters:
+                value = result.get(key)
+                try:
+                    if type(value) is list:
+                        result[key] = [convert(v) for v in value]
+                    elif value is not None:
+                        result[key] = convert(value)
+                except ValueError:
+                    raise DocoptExit('%s expects %s, got %r' % (key, name, value))
+            return result
+        raise self.exit(tokens)
+
+    def names(self):
+        """Typo indexes of the command names and long option names.
+
+        Only needed when a parse fails, so they are built on first use
+        and then kept with the spec.
+
+        """
+        if self._names is None:
+            options = set(o.long for o in self.option_index if o.long)
+            self._set('_names', (TypoIndex(self.commands), TypoIndex(options),
+                                 command_slots(self.pattern)))
+        return self._names
+
+    def suggest(self, word, max_distance=2, limit=3):
+        """Commands, or long options for `--words`, that `word` is a typo of.
+
+        Closest first, at most `limit`. Short words allow fewer edits so
+        that they are not close to everything.
+
+        """
+        commands, options, slots = self.names()
+        tree = options if word.startswith('--') else commands
+        max_distance = min(max_distance, len(word.lstrip('-')) // 3)
+        return [name for d, name in tree.search(word, max_distance)
+                if d > 0][:limit]
+
+    def exit(self, tokens):
+        """`DocoptExit` for a failed match, naming the first likely typo.
+
+        A positional token is only taken for a typo in a command position,
+        where no usage line has an argument that could take it.
+
+        """
+        commands, options, slots = self.names()
+        positional = [t.value for t in tokens if type(t) is not Option]
+        position = 0
+        for token in tokens:
+            allowed = None
+            if type(token) is Option:
+                if token.long is None or self.option_index.long(token.long):
+                    continue
+                word = token.long
+            else:
+                allowed = commands_at(slots, positional, position)
+                position += 1
+                if not allowed or token.value in allowed:
+                    continue
+                word = token.value
+            suggestions = self.suggest(word, limit=len(commands) + 3)
+            if allowed is not None:
+                suggestions = [name for name in suggestions if name in allowed]
+            suggestions = suggestions[:3]
+            if suggestions:
+                ex = DocoptExit('%r is not known, did you mean %s?' % (
+                    word, ' or '.join(suggestions)))
+                ex.suggestions = suggestions
+                return ex
+        return DocoptExit()
+
+
+class SpecStore(object):
+
+    """Persistent store of compiled specs, one pickle file per entry.
+
+    Entries are keyed by namespace, fingerprint of the doc and library
+    version, so upgrading fallbackdocopt or changing the doc never reads a
+    stale entry. The doc itself is stored with the value and compared on
+    load. Writes go to a temporary file that is renamed into place.
+
+    """
+
+    def __init__(self, directory=None):
+        if directory is None:
+            base = os.environ.get('XDG_CACHE_HOME') or \
+                os.path.join(os.path.expanduser('~'), '.cache')
+            directory = os.path.join(base, 'fallbackdocopt')
+        self.directory = directory
+        self.version = '%s-%d-%d%d' % (__version__, SPEC_FORMAT,
+                                       sys.version_info[0],
+                                       sys.version_info[1])
+
+    def path(self, namespace, doc):
+        return os.path.join(self.directory, '%s-%s-%s.pickle' % (
+            namespace, fingerprint(doc), self.version))
+
+    def load(self, namespace, doc):
+        """Return the value stored for `doc`, or None if there is none."""
+        import pickle  # only needed when a disk cache is enabled
+        path = self.path(namespace, doc)
+        try:
+            with open(path, 'rb') as f:
+                stored_doc, value = pickle.load(f)
+        except (IOError, OSError):
+            return None
+        except Exception:
+            # truncated or foreign file, drop it and recompile
+            self._remove(path)
+            return None
+        if stored_doc != doc:
+            return None
+        return value
+
+    def save(self, namespace, doc, value):
+        """Atomically write `value` for `doc`, errors are not fatal."""
+        import pickle
+        import tempfile
+        path = self.path(namespace, doc)
+        tmp = None
+        try:
+            if not os.path.isdir(self.directory):
+                os.makedirs(self.directory, 0o700)
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump((doc, value), f, pickle.HIGHEST_PROTOCOL)
+            getattr(os, 'replace', os.rename)(tmp, path)
+        except (IOError, OSError, pickle.PicklingError):
+            if tmp is not None:
+                self._remove(tmp)
+            return False
+        return True
+
+    def clear(self):
+        if not os.path.isdir(self.directory):
+            return
+        for name in os.listdir(self.directory):
+            if name.endswith('.pickle') or name.endswith('.tmp'):
+                self._remove(os.path.join(self.directory, name))
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class SpecCache(object):
+
+    """Bounded LRU of compiled specs keyed by the fingerprint of the doc.
+
+    When a `SpecStore` is attached, misses are looked up on disk before
+    compiling and freshly compiled specs are written back.
+
+    """
+
+    def __init__(self, maxsize=128, store=None):
+        self.maxsize = maxsize
+        self.store = store
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._specs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._specs)
+
+    def __contains__(self, doc):
+        return fingerprint(doc) in self._specs
+
+    def get(self, doc):
+        """Return the compiled spec for `doc`, compiling it on a miss."""
+        key = fingerprint(doc)
+        with self._lock:
+            spec = self._specs.pop(key, None)
+            if spec is not None:
+                self.hits += 1
+                self._specs[key] = spec
+                return spec
+            self.misses += 1
+        store = self.store
+        spec = store.load('spec', doc) if store is not None else None
+        if spec is None:
+            spec = Spec(doc)
+            if store is not None:
+                store.save('spec', doc, spec)
+        self.put(spec)
+        return spec
+
+    def put(self, spec):
+        with self._lock:
+            self._specs.pop(spec.fingerprint, None)
+            self._specs[spec.fingerprint] = spec
+            while len(self._specs) > max(self.maxsize, 0):
+                self._specs.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._specs.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses,
+                'evictions': self.evictions, 'size': len(self._specs),
+                'maxsize': self.maxsize}
+
+
+spec_cache = SpecCache()
+
+
+def enable_disk_cache(directory=None):
+    """Persist compiled specs of `spec_cache` under `directory`.
+
+    Defaults to $XDG_CACHE_HOME/fallbackdocopt. Returns the `SpecStore`.
+
+    """
+    spec_cache.store = SpecStore(directory)
+    return spec_cache.store
+
+
+def disable_disk_cache():
+    spec_cache.store = None
+
+
+def compile_spec(doc, cache=True):
+    """Return the compiled `Spec` for `doc`, from `spec_cache` if allowed."""
+    if cache:
+        return spec_cache.get(doc)
+    return Spec(doc)
+
+
+def docopt(doc, argv=None, help=True, version=None, options_first=False,
+           engine='recursive'):
     """Parse `argv` based on command-line interface described in `doc`.
 
     `docopt` creates your command-line interface based on its
@@ -515,6 +1490,9 @@ def docopt(doc, argv=None, help=True, version=None, options_first=False):
     options_first : bool (default: False)
         Set to True to require options preceed positional arguments,
         i.e. to forbid options and positional arguments intermix.
+    engine : str (default: 'recursive')
+        'recursive' matches with the pattern tree, 'automaton' runs the
+        same match as a compiled program, see `Automaton`.
 
     Returns
     -------
@@ -556,26 +1534,4 @@ def docopt(doc, argv=None, help=True, version=None, options_first=False):
     """
     if argv is None:
         argv = sys.argv[1:]
-    DocoptExit.usage = printable_usage(doc)
-    options = parse_defaults(doc)
-    pattern = parse_pattern(formal_usage(DocoptExit.usage), options)
-    # [default] syntax for argument is disabled
-    #for a in pattern.flat(Argument):
-    #    same_name = [d for d in arguments if d.name == a.name]
-    #    if same_name:
-    #        a.value = same_name[0].value
-
-    argv = parse_argv(TokenStream(argv, DocoptExit), list(options),
-                      options_first)
-    pattern_options = set(pattern.flat(Option))
-    for ao in pattern.flat(AnyOptions):
-        doc_options = parse_defaults(doc)
-        ao.children = list(set(doc_options) - pattern_options)
-        #if any_options:
-        #    ao.children += [Option(o.short, o.long, o.argcount)
-        #                    for o in argv if type(o) is Option]
-    extras(help, version, argv, doc)
-    matched, left, collected = pattern.fix().match(argv)
-    if matched:
-        return Dict((a.name, a.value) for a in (pattern.flat() + collected))
-    raise DocoptExit()
+    return compile_spec(doc).parse(argv, help, version, options_first, engine)
@@ -13,6 +13,12 @@ from future import standard_library
 standard_library.install_aliases()
 #from unittester import *
 from arguments import *
+from fallbackdocopt import SpecCache, SpecStore, compile_spec
+import os
+import sys
+import shutil
+import tempfile
+import subprocess
 import unittest
 
 def raises_error(*args, **kwds):
@@ -130,6 +136,208 @@ class ArgumentTest(unittest.TestCase):
         self.assertIsNotNone(args)
         self.assertEqual(args.option, 4)
 
+    def test_typed(self):
+        """
+        test_typed
+        """
+        doc = """
+            Usage:
+                prog serve <port:int> [--ratio=<f:float>] [--release=<v:str>] [--retries=<n>]
+
+            Options:
+                -r --ratio=<f:float>  Ratio [default: 0.5].
+                --release=<v:str>     Release, see <host:port>.
+                --retries=<n>         Retries.
+        """
+        spec = compile_spec(doc)
+        self.assertEqual(dict(spec.types), {"<port>": "int", "--ratio": "float", "--release": "str"})
+        args = Arguments(doc, argvalue=["serve", "8080", "--release=1.10"])
+        self.assertEqual(args.port, 8080)
+        self.assertEqual(args.ratio, 0.5)
+        self.assertEqual(args.release, "1.10")
+        self.assertRaises(DocoptExit, spec.parse, ["serve", "http"])
+
+        class Typed(Arguments):
+            """
+            Typed
+            """
+            m_types = {"retries": str}
+
+        self.assertEqual(Typed(doc, argvalue=["serve", "1", "--retries=3"]).retries, "3")
+        self.assertEqual(Arguments(doc, argvalue=["serve", "1", "--retries=3"]).retries, 3)
+        self.assertEqual(next(parse_many(doc, [["serve", "80", "-r", "2"]])).ratio, 2.0)
+
+    def test_paths(self):
+        """
+        test_paths
+        """
+        doc = """
+            Usage:
+                prog copy <folder> <paths>...
+        """
+        resolver = PathResolver()
+        self.assertEqual(normalize_path("<folder>", "./a/../b", resolver), os.path.abspath("./a/../b"))
+        self.assertEqual(normalize_path("<folder>", "~/x", resolver), os.path.expanduser("~/x"))
+        self.assertEqual(normalize_path("<folder>", ".", resolver), os.getcwd())
+        args = Arguments(doc, argvalue=["copy", ".", "tests.py", "nothere", "setup.py"])
+        self.assertEqual(args.folder, os.getcwd())
+        stats = args.stat_paths("paths", workers=2)
+        self.assertEqual([s is not None for s in stats], [True, False, True])
+        self.assertEqual(stats[2].st_size, os.stat("setup.py").st_size)
+        stats = stat_paths(["setup.py", "nothere"] * 40, workers=2)
+        self.assertEqual([s and s.st_size for s in stats], [os.stat("setup.py").st_size, None] * 40)
+
+    def test_doc_cache(self):
+        """
+        test_doc_cache
+        """
+        doc = """
+            Usage:
+                tool <command>
+
+            Commands:
+                run     Run it
+                build   Build it
+        """
+
+        class Tool(Arguments):
+            """
+            Tool
+            """
+            m_commandline_help = {"build": "Build everything"}
+
+        first = Tool(doc, argvalue=["run"])
+        second = Tool(doc, argvalue=["build"])
+        self.assertIs(first.m_doc, second.m_doc)
+        self.assertIs(normalize_doc(doc), first.m_doc)
+        self.assertEqual(command_table(first.m_doc), (("build", ": Build it"), ("run", ": Run it")))
+        self.assertEqual(second.m_commandline_help_default, {"run": ": Run it"})
+        self.assertEqual(Arguments(doc, argvalue=["run"]).m_commandline_help_default["build"], ": Build it")
+
+    def test_help_request(self):
+        """
+        test_help_request
+        """
+        import io
+        import arguments
+        self.assertEqual(help_request(["aa", "-h"], optionsdoc), "help")
+        self.assertEqual(help_request(["-h", "--version"], optionsdoc), "version")
+        self.assertEqual(help_request(["-o", "-h"], optionsdoc), None)
+        self.assertEqual(help_request(["--", "-h"], optionsdoc), None)
+        self.assertEqual(help_request(["-h"], "Usage:\n  prog <a>\n"), None)
+        stdout, compile_spec = sys.stdout, arguments.compile_spec
+        sys.stdout = io.StringIO()
+        arguments.compile_spec = None
+
+        try:
+            self.assertRaises(SystemExit, Arguments, optionsdoc, argvalue=["aa", "--help"])
+            self.assertRaises(SystemExit, Arguments, optionsdoc, argvalue=["--version"], version="1.2")
+            printed = sys.stdout.getvalue()
+        finally:
+            sys.stdout, arguments.compile_spec = stdout, compile_spec
+
+        self.assertEqual(printed, commandless_help(normalize_doc(optionsdoc))[1] + "\n1.2\n")
+
+    def test_help_request_option_value(self):
+        """
+        test_help_request_option_value
+        """
+        doc = "Database tool\nUsage:\n  tool [options] <db>\n\nOptions:\n  -h --host=<host>  Server [default: localhost].\n  --help            Show this screen.\n"
+        self.assertEqual(help_request(["-h", "example.org", "mydb"], doc), None)
+        self.assertEqual(help_request(["--host=-h", "mydb"], doc), None)
+        self.assertEqual(help_request(["mydb", "--he"], doc), "help")
+        args = Arguments(doc, argvalue=["-h", "example.org", "mydb"])
+        self.assertEqual(args.host, "example.org")
+        self.assertEqual(args.db, "mydb")
+
+    def test_route(self):
+        """
+        test_route
+        """
+        class Main(Arguments):
+            """
+            Main
+            """
+            def __init__(self, argvalue=None):
+                super().__init__("Main\nUsage:\n  prog [options] <tool> [<args>...]\n\nOptions:\n  -v --verbose  Verbose.\n", argvalue=argvalue)
+
+        @Main.subcommand("db")
+        class Db(Arguments):
+            """
+            Db
+            """
+            def __init__(self, argvalue=None):
+                super().__init__("Db\nUsage:\n  prog db [--url=<url>] <command> [<args>...]\n", argvalue=argvalue)
+
+        @Db.subcommand("migrate")
+        class Migrate(Arguments):
+            """
+            Migrate
+            """
+            def __init__(self, argvalue=None):
+                super().__init__("Migrate\nUsage:\n  prog migrate [--dry] <steps:int>\n", argvalue=argvalue)
+
+        args = Main.route(["-v", "db", "--url=migrate", "migrate", "--dry", "3"])
+        self.assertIsInstance(args, Migrate)
+        self.assertEqual(args.steps, 3)
+        self.assertTrue(args.dry)
+        self.assertEqual([type(p) for p in args.m_parents], [Main, Db])
+        self.assertEqual(args.m_parents[0].args, [])
+        self.assertTrue(args.m_parents[0].verbose)
+        self.assertEqual(args.m_parents[1].url, "migrate")
+        args = Main.route(["db", "--url", "migrate", "-v", "migrate", "3"])
+        self.assertIsInstance(args, Migrate)
+        self.assertEqual(args.m_parents[1].url, "migrate")
+        self.assertEqual(args.m_parents[1].args, [])
+        self.assertIsNone(compile_spec(args.m_parents[1].m_doc)._names)
+        self.assertEqual(Main.route(["other", "db"]).args, ["db"])
+        self.assertEqual(Main.m_commands, {"db": Db})
+        self.assertEqual(Arguments.m_commands, {})
+
+    def test_lazy_subcommands(self):
+        """
+        test_lazy_subcommands
+        """
+        import io
+        folder = tempfile.mkdtemp()
+
+        with open(os.path.join(folder, "lazytool.py"), "w") as f:
+            f.write("from arguments import Arguments\n\n\nclass Sync(Arguments):\n    \"\"\"\n    Sync the data\n    \"\"\"\n"
+                    "    def __init__(self, argvalue=None):\n        super().__init__(\"Sync\\nUsage:\\n  prog sync <target>\\n\", argvalue=argvalue)\n")
+
+        class Main(Arguments):
+            """
+            Main
+            """
+            def __init__(self, argvalue=None):
+                super().__init__("Main\nUsage:\n  prog [options] <tool> [<args>...]\n\nOptions:\n  -h --help  Help.\n", argvalue=argvalue)
+
+        Main.add_subcommands({"sync": ("lazytool:Sync", "Sync the data"), "push": "lazytool:Sync"})
+        sys.path.insert(0, folder)
+
+        try:
+            self.assertEqual(Main.route(["other"]).tool, "other")
+            self.assertNotIn("lazytool", sys.modules)
+            self.assertEqual(subcommand_manifest(Main.m_commands), (("push", ""), ("sync", "Sync the data")))
+            self.assertEqual(entry_point_commands("arguments.tests.none"), {})
+            stdout = sys.stdout
+            sys.stdout = io.StringIO()
+
+            try:
+                self.assertRaises(SystemExit, Main.route, ["-h"])
+                printed = sys.stdout.getvalue()
+            finally:
+                sys.stdout = stdout
+
+            self.assertIn("sync :   Sync the data", printed)
+            self.assertNotIn("lazytool", sys.modules)
+            self.assertEqual(Main.route(["sync", "db"]).target, "db")
+            self.assertIn("lazytool", sys.modules)
+        finally:
+            sys.path.remove(folder)
+            sys.modules.pop("lazytool", None)
+            shutil.rmtree(folder)
+
     def test_context(self):
         """
         test_context
@@ -141,6 +349,537 @@ class ArgumentTest(unittest.TestCase):
         self.assertEqual(args.option, 4)
         self.assertTrue(args.contextindicator)
 
+class SpecCacheTest(unittest.TestCase):
+    """
+    @type unittest.TestCase: class
+    @return: None
+    """
+    def test_cache_counters(self):
+        """
+        test_cache_counters
+        """
+        cache = SpecCache(maxsize=1)
+        spec = cache.get(optionsdoc)
+        self.assertIs(spec, cache.get(optionsdoc))
+        cache.get(optionsdoc2)
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 2)
+        self.assertEqual(cache.stats()["evictions"], 1)
+        self.assertNotIn(optionsdoc, cache)
+
+    def test_cached_parse_does_not_recompile(self):
+        """
+        test_cached_parse_does_not_recompile
+        """
+        import fallbackdocopt
+        parse_pattern = fallbackdocopt.parse_pattern
+        compiled = []
+
+        def counting_parse_pattern(*args):
+            """
+            counting_parse_pattern
+            """
+            compiled.append(args)
+            return parse_pattern(*args)
+
+        doc = optionsdoc.replace("arguments test", "arguments recompile test")
+        fallbackdocopt.parse_pattern = counting_parse_pattern
+
+        try:
+            for argv in (['aa', 'bb'], ['-o', '4', 'cc', 'dd'], ['ee', 'ff']):
+                docopt(doc, argv)
+                Arguments(doc, argvalue=argv)
+        finally:
+            fallbackdocopt.parse_pattern = parse_pattern
+
+        # once for the doc as given to docopt, once for the doc Arguments normalized
+        self.assertEqual(len(compiled), 2)
+
+    def test_spec_parse(self):
+        """
+        test_spec_parse
+        """
+        spec = compile_spec(optionsdoc)
+        first = spec.parse(['-o', '4', 'aa', 'bb'])
+        second = spec.parse(['cc', 'dd'])
+        self.assertEqual(first["--option"], "4")
+        self.assertIsNone(second["--option"])
+        self.assertEqual(second["<posarg1>"], "cc")
+        self.assertEqual(dict(first), dict(docopt(optionsdoc, ['-o', '4', 'aa', 'bb'])))
+        self.assertRaises(AttributeError, setattr, spec, "usage", "")
+
+    def test_disk_store(self):
+        """
+        test_disk_store
+        """
+        store = SpecStore(tempfile.mkdtemp())
+        SpecCache(store=store).get(optionsdoc)
+        self.assertTrue(os.path.exists(store.path("spec", optionsdoc)))
+        spec = SpecCache(store=store).get(optionsdoc)
+        self.assertEqual(spec.parse(['aa', 'bb'])["<posarg2>"], "bb")
+
+        with open(store.path("spec", optionsdoc), "wb") as f:
+            f.write(b"garbage")
+
+        self.assertIsNone(store.load("spec", optionsdoc))
+        self.assertFalse(os.path.exists(store.path("spec", optionsdoc)))
+        store.clear()
+
+class MatchTest(unittest.TestCase):
+    """
+    @type unittest.TestCase: class
+    @return: None
+    """
+    def test_long_positional_list(self):
+        """
+        test_long_positional_list
+        """
+        doc = "Usage:\n  prog [-v] <file>...\n\nOptions:\n  -v  Verbose.\n"
+        paths = ["p%d" % i for i in range(20000)]
+        result = docopt(doc, paths[:10] + ["-v"] + paths[10:])
+        self.assertEqual(result["<file>"], paths)
+        self.assertTrue(result["-v"])
+
+    def test_repeating_without_expansion(self):
+        """
+        test_repeating_without_expansion
+        """
+        import fallbackdocopt
+        doc = "Usage:\n  prog " + " ".join("(a%d | b%d)" % (i, i) for i in range(40)) + " (<x> | <y>) [<x> | <z>] [-v...]\n"
+        spec = compile_spec(doc)
+        result = spec.parse(["a%d" % i for i in range(40)] + ["1", "2", "-vv"])
+        self.assertEqual(result["<x>"], ["1", "2"])
+        self.assertEqual(result["-v"], 2)
+        self.assertFalse(result["b0"])
+        limit = fallbackdocopt.EITHER_LIMIT
+        fallbackdocopt.EITHER_LIMIT = 100
+
+        try:
+            self.assertRaises(fallbackdocopt.DocoptLanguageError, lambda: spec.pattern.either)
+        finally:
+            fallbackdocopt.EITHER_LIMIT = limit
+
+    def test_structural_hash(self):
+        """
+        test_structural_hash
+        """
+        import pickle
+        from fallbackdocopt import Argument, Command, Option, Required
+        self.assertEqual(Option("-v", "--verbose", 0, False), Option("-v", "--verbose", 0, False))
+        self.assertNotEqual(Option("-v", None, 0, 0), Option("-v", None, 0, False))
+        self.assertNotEqual(Argument("go", False), Command("go", False))
+        self.assertEqual(Required(Argument("<x>")), Required(Argument("<x>")))
+        leaf = Argument("<x>")
+        hash(leaf)
+        leaf.value = []
+        self.assertEqual(hash(leaf), hash(Argument("<x>", [])))
+        self.assertIsNone(pickle.loads(pickle.dumps(leaf))._hash)
+        spec = compile_spec("Usage:\n  prog <x> [<x>] (-v | <x>)\n")
+        leaves = spec.pattern.flat(Argument)
+        self.assertTrue(all(x is leaves[0] for x in leaves))
+
+    def test_slotted_leaves(self):
+        """
+        test_slotted_leaves
+        """
+        import pickle
+        from fallbackdocopt import Argument, Command, Option
+        for leaf in (Argument("<x>", "1"), Command("go", True), Option("-v", "--verbose", 1, "a")):
+            self.assertFalse(hasattr(leaf, "__dict__"))
+            self.assertEqual(pickle.loads(pickle.dumps(leaf)), leaf)
+
+    def test_option_index(self):
+        """
+        test_option_index
+        """
+        from fallbackdocopt import Option, OptionIndex
+        index = OptionIndex([Option("-a", "--alpha"), Option("-b", "--alphabet", 1), Option(None, "--cc")])
+        overlay = index.overlay()
+        overlay.append(Option(None, "--alps"))
+        self.assertEqual([o.long for o in overlay.prefixed("--alp")], ["--alpha", "--alphabet", "--alps"])
+        self.assertEqual([o.long for o in index.prefixed("--alp")], ["--alpha", "--alphabet"])
+        self.assertEqual(overlay.short("-b")[0].long, "--alphabet")
+        self.assertEqual(len(overlay), 4)
+        self.assertEqual(docopt(optionsdoc, ["--para", "5", "a", "b"])["--parameter"], "5")
+
+        try:
+            docopt(optionsdoc, ["--opt", "5", "a", "b"])
+        except DocoptExit as ex:
+            self.assertTrue(str(ex).startswith("--opt is not a unique prefix: --option, --opt2?"))
+        else:
+            self.fail("no DocoptExit")
+
+    def test_typo_suggestions(self):
+        """
+        test_typo_suggestions
+        """
+        from fallbackdocopt import TypoIndex
+        doc = "Usage:\n  prog deploy <app> [--verbose]\n  prog destroy <app>\n  prog status\n\nOptions:\n  --verbose  Verbose.\n"
+        spec = compile_spec(doc)
+
+        for argv, expected in ((["depoly", "x"], ["deploy"]), (["statsu"], ["status"]), (["deploy", "--verbsoe"], ["--verbose"]), (["nothing", "alike"], [])):
+            try:
+                spec.parse(argv)
+            except DocoptExit as ex:
+                self.assertEqual(list(ex.suggestions), expected)
+            else:
+                self.fail("no DocoptExit for %r" % argv)
+
+        spec = compile_spec("Usage:\n  prog add <name> <value>\n  prog a <x>\n  prog b\n  prog remote (add|remove) <x>\n")
+
+        for argv, expected in ((["add", "ad"], []), (["3"], []), (["ab"], []), (["remote", "remvoe", "x"], ["remove"])):
+            try:
+                spec.parse(argv)
+            except DocoptExit as ex:
+                self.assertEqual(list(ex.suggestions), expected)
+
+                if not expected:
+                    self.assertNotIn("is not known", str(ex))
+            else:
+                self.fail("no DocoptExit for %r" % argv)
+
+        index = TypoIndex(["deploy", "destroy", "status"])
+        self.assertEqual(index.search("destory", 2), [(2, "destroy")])
+        self.assertEqual(index.search("deploy", 0), [(0, "deploy")])
+
+    def test_left_cursors(self):
+        """
+        test_left_cursors
+        """
+        from fallbackdocopt import Argument, Left, Option
+        left = Left([Argument(None, "a"), Option("-v", None, 0, True), Argument(None, "b")])
+        rest = left.consume_positional().consume_option("-v")
+        self.assertEqual(len(left), 3)
+        self.assertEqual(list(rest), [Argument(None, "b")])
+        self.assertIsNone(rest.option("-v"))
+
+    def test_command_index(self):
+        """
+        test_command_index
+        """
+        doc = "Usage:\n" + "".join("  prog cmd%d <x>\n" % i for i in range(50)) + "  prog ship new <x>\n  prog ship <x> move\n  prog [-v] <x>\n"
+        spec = compile_spec(doc)
+        self.assertEqual(len(spec.index.children), 53)
+        self.assertEqual(spec.parse(["cmd7", "a"])["cmd7"], True)
+        self.assertEqual(spec.parse(["ship", "new", "a"])["new"], True)
+        self.assertEqual(spec.parse(["ship", "a", "move"])["<x>"], "a")
+        self.assertEqual(spec.parse(["-v", "cmd7"])["<x>"], "cmd7")
+        self.assertRaises(DocoptExit, spec.parse, [])
+
+
+engine_corpus = [(optionsdoc, [[], ['aa', 'bb'], ['-o', '4', "--opt2='foobar'", 'aa', 'bb'], ['-vp', '3', 'aa', 'bb'], ['--opt', '5', 'aa', 'bb'], ['aa', 'bb', 'cc'], ['--bogus', 'aa', 'bb']]),
+                 (optionsdoc2, [['contextindicator', '-o', '4', 'bb', 'aa'], ['aa', 'bb'], ['contextindicator', 'aa']]),
+                 ("""Usage:
+  prog ship new <name>...
+  prog ship <name> move <x> <y> [--speed=<kn>]
+  prog ship shoot <x> <y>
+  prog mine (set|remove) <x> <y> [--moored|--drifting]
+  prog go [-v...] (--moored|--drifting) [<x> [<y>]]
+  prog [options] [--] <tool> [<args>...]
+
+Options:
+  -v            Verbose.
+  --speed=<kn>  Speed in knots [default: 10].
+  --moored      Moored (anchored) mine.
+  --drifting    Drifting mine.
+""", [['ship', 'new', 'a', 'b'], ['ship', 'a', 'move', '1', '2', '--speed=3'], ['ship', 'shoot', '1', '2'], ['mine', 'set', '1', '2', '--drifting'],
+      ['mine', 'remove', '1', '2', '--moored', '--drifting'], ['go', '-vvv', '--moored', '1'], ['go', '-v', '-v', '--drifting'], ['tool', '--', '-v', 'x'],
+      ['--sp', '4', 'ship', 'shoot', '1', '2'], ['ship'], ['mine', 'x', '1', '2'], ['-v', 'tool', 'a', 'b', 'c']])]
+
+
+class EngineTest(unittest.TestCase):
+    """
+    @type unittest.TestCase: class
+    @return: None
+    """
+    @staticmethod
+    def outcome(doc, argv, engine):
+        """
+        @type doc: str
+        @type argv: list
+        @type engine: str
+        @return: tuple
+        """
+        try:
+            return True, docopt(doc, list(argv), engine=engine)
+        except DocoptExit as ex:
+            return False, ex.code
+
+    def test_engines_agree(self):
+        """
+        test_engines_agree
+        """
+        for doc, argvs in engine_corpus:
+            for argv in argvs:
+                self.assertEqual(self.outcome(doc, argv, "recursive"), self.outcome(doc, argv, "automaton"), argv)
+
+    def test_unknown_engine(self):
+        """
+        test_unknown_engine
+        """
+        self.assertRaises(ValueError, docopt, optionsdoc, ['aa', 'bb'], engine="dfa")
+
+
+class SchemaTest(unittest.TestCase):
+    """
+    SchemaTest
+    """
+    def test_compile(self):
+        """
+        test_compile
+        """
+        def outcome(validate, data):
+            """
+            @type validate: function
+            @type data: object
+            @return: tuple
+            """
+            try:
+                return "ok", validate(data)
+            except SchemaError as ex:
+                return "error", ex.code, ex.autos, ex.errors
+
+        schemas = [int, "a", [int, [str]], (int, str), Use(int, error="need int"), And(Use(int), lambda n: n >= 0), Or(int, float, error="num"),
+                   {"a": int, "b": Use(int), Optional("c"): str}, {"a": int, Optional("c", default=3): int}, {str: Or(None, str, [str])}, Schema({"x": And(str, len)}),
+                   {lambda k: k.startswith("a"): int, Optional("ab"): str}, {"ab": int, Optional("ab"): str, str: object}]
+        datas = [1, -1, "1", None, [1, "a"], (1,), {"a": 1}, {"a": "1", "b": "2"}, {"a": 1, "b": "2", "c": "z"}, {"a": 1, "d": 5}, {"x": ""}, {"q": ["a"]}, {"ab": "x"}, {"ab": 1, "a": 2}, 2.5]
+
+        for schema in schemas:
+            compiled = Schema(schema).compile()
+
+            for data in datas:
+                self.assertEqual(outcome(compiled, data), outcome(Schema(schema).validate, data))
+
+        schema = Schema({"a": int})
+        self.assertIs(schema.compile(), schema.compile())
+        schema.add_void_schema_item("b")
+        self.assertEqual(schema.compile()({"a": 1, "b": 2}), {"a": 1, "b": "2"})
+
+    def test_collect(self):
+        """
+        test_collect
+        """
+        class Value(object):
+            """
+            counts how often it is formatted
+            """
+            formatted = 0
+
+            def __repr__(self):
+                """
+                __repr__
+                """
+                Value.formatted += 1
+                return "Value()"
+
+        schema = Schema({"a": Use(int), "b": Or(int, float), Optional("c"): int, "d": bool})
+
+        try:
+            schema.compile(collect=True)({"a": "x", "b": Value(), "e": 1})
+        except SchemaError as ex:
+            self.assertEqual(Value.formatted, 0)
+            self.assertEqual([(r.key, r.value) for r in ex.records][:3], [("a", "x"), ("b", ex.records[1].value), ("e", 1)])
+            self.assertEqual(ex.records[3].key, "d")
+            self.assertIn("invalid value for key 'a'", ex.code)
+            self.assertEqual(ex.args, (ex.code,))
+            self.assertEqual(repr(ex), "SchemaError(%r)" % ex.code)
+            self.assertIn("missed key 'd'", str(ex))
+            self.assertTrue(Value.formatted > 0)
+        else:
+            self.fail("no SchemaError")
+
+        self.assertEqual(schema.compile(collect=True)({"a": "1", "b": 2.5, "d": True}), {"a": 1, "b": 2.5, "d": True})
+
+    def test_validate_many(self):
+        """
+        test_validate_many
+        """
+        import arguments
+        schema = Schema({"port": And(int, Range(1, 65535)), "name": And(str, len), Optional("force"): bool, Optional("n", default=3): Use(int)})
+        records = [{"port": 80, "name": "web"}, {"port": 0, "name": "web"}, {"port": "80", "name": "web"}, {"port": 443, "name": "", "force": True},
+                   {"port": 22, "name": "ssh", "force": 1}, {"port": 8080, "name": "app", "n": "7"}, {"name": "x"}, {"port": 1, "name": "x", "other": 1}]
+        import_numpy = arguments.import_numpy
+
+        for numpy in (import_numpy, lambda: None):
+            arguments.import_numpy = numpy
+
+            try:
+                validated, mask = Schema(schema._schema).validate_many(records)
+            finally:
+                arguments.import_numpy = import_numpy
+
+            self.assertEqual(mask, [False, True, True, True, True, False, True, True])
+            self.assertEqual(validated[0], {"port": 80, "name": "web", "n": 3})
+            self.assertEqual(validated[5], {"port": 8080, "name": "app", "n": 7})
+            self.assertEqual(validated[1], None)
+
+        self.assertEqual(Schema([int]).validate_many([[1, 2], ["a"]]), ([[1, 2], None], [False, True]))
+
+
+class ImportTest(unittest.TestCase):
+    """
+    @type unittest.TestCase: class
+    @return: None
+    """
+    def test_lazy_imports(self):
+        """
+        test_lazy_imports
+        """
+        code = "import arguments, sys; print([m for m in ('yaml', 'consoleprinter', 'pickle', 'json') if m in sys.modules])"
+        output = subprocess.check_output([sys.executable, "-c", code], cwd=os.path.dirname(os.path.abspath(__file__)))
+        self.assertEqual(output.strip(), b"[]")
+
+    def test_lazy_function(self):
+        """
+        test_lazy_function
+        """
+        self.assertEqual(snake_case("MainArguments"), "main_arguments")
+        self.assertEqual(yaml.safe_load("a: 1"), {"a": 1})
+
+
+class ParseManyTest(unittest.TestCase):
+    """
+    ParseManyTest
+    """
+    def test_parse_many(self):
+        """
+        test_parse_many
+        """
+        doc = """
+            Usage:
+                tool deploy <app> [--force]
+                tool status [<app>...]
+
+            Options:
+                -f --force  Force it.
+        """
+        argvs = [["deploy", "web", "-f"], ["status", "a", "b"], ["deploy"], ["deploy", "--forse"]]
+        results = list(parse_many(doc, iter(argvs)))
+        self.assertEqual([r.ok for r in results], [True, True, False, False])
+        self.assertEqual(results[0].app, ["web"])
+        self.assertTrue(results[0].force)
+        self.assertTrue(results[0].deploy)
+        self.assertEqual(results[1].app, ["a", "b"])
+        self.assertEqual(results[2].argv, ["deploy"])
+        self.assertEqual(list(results[3].suggestions), ["--force"])
+        self.assertRaises(AttributeError, getattr, results[0], "nothing")
+
+    def test_parse_file(self):
+        """
+        test_parse_file
+        """
+        import json
+        doc = """
+            Usage:
+                tool deploy <app> [--force]
+                tool status [<app>...]
+
+            Options:
+                -f --force  Force it.
+        """
+        directory = tempfile.mkdtemp()
+        lines = ['deploy web --force', 'status a "b c"', '', 'deploy', 'deploy "unclosed']
+        expected = [(1, True), (2, True), (4, False), (5, False)]
+
+        for name, jsonl in (("commands.txt", False), ("commands.jsonl", True)):
+            infile = os.path.join(directory, name)
+
+            with open(infile, "w") as f:
+                for line in lines:
+                    f.write((json.dumps(line) if jsonl and line else line) + "\n")
+
+            for workers in (1, 2):
+                outfile = os.path.join(directory, "out.jsonl")
+                self.assertEqual(parse_file(doc, infile, outfile, workers=workers, chunksize=2), 4)
+
+                with open(outfile) as f:
+                    records = [json.loads(line) for line in f]
+
+                self.assertEqual([(r["line"], r["ok"]) for r in records], expected)
+                self.assertEqual(records[1]["positional"]["app"], ["a", "b c"])
+
+        for line in ("5", "true", "null", '{"argv": "deploy web"}'):
+            self.assertRaises(ValueError, split_command_line, line, True)
+
+        self.assertEqual(split_command_line('"deploy web"', True), ["deploy", "web"])
+        shutil.rmtree(directory)
+
+    def test_parse_async(self):
+        """
+        test_parse_async
+        """
+        import asyncio
+        doc = """
+            Usage:
+                tool deploy <app> [--force]
+                tool status [<app>...]
+
+            Options:
+                -f --force  Force it.
+        """
+
+        class Argvs(object):
+            """
+            async iterator over argument vectors without async syntax
+            """
+            def __init__(self, argvs):
+                """
+                @type argvs: list
+                @return: None
+                """
+                self.argvs = iter(argvs)
+
+            def __aiter__(self):
+                """
+                __aiter__
+                """
+                return self
+
+            def __anext__(self):
+                """
+                __anext__
+                """
+                future = asyncio.get_event_loop().create_future()
+
+                try:
+                    future.set_result(next(self.argvs))
+                except StopIteration:
+                    future.set_exception(StopAsyncIteration())
+
+                return future
+
+        def check(app):
+            """
+            @type app: list
+            @return: object
+            """
+            if app == ["bad"]:
+                raise ValueError("bad app")
+
+            return asyncio.sleep(0.05 if app == ["slow"] else 0, result=app)
+
+        def collect(results):
+            """
+            @type results: collections.abc.AsyncIterator
+            @return: list
+            """
+            collected = []
+
+            while True:
+                try:
+                    collected.append(loop.run_until_complete(results.__anext__()))
+                except StopAsyncIteration:
+                    return collected
+
+        loop = asyncio.new_event_loop()
+        results = collect(parse_async(doc, Argvs([["deploy", "slow"], ["deploy", "fast"], ["deploy"], ["status"]]), Schema({"app": Use(check)}), limit=2))
+        self.assertEqual([(r.argv, r.ok) for r in results], [(["deploy", "fast"], True), (["deploy"], False), (["status"], True), (["deploy", "slow"], True)])
+        self.assertEqual(results[3].app, ["slow"])
+        results = collect(parse_async(doc, Argvs([["deploy", "bad"]]), Schema({"app": Use(check)})))
+        self.assertFalse(results[0].ok)
+        loop.close()
+
+
 
 
 def main():